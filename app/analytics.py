@@ -0,0 +1,199 @@
+# ===================================================
+# FORECAST ANALYTICS: Daily summaries (analytics.py)
+# ===================================================
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+
+# A 5-day forecast in 3-hour slots touches at most 6 calendar days (UTC)
+MAX_DAYS = 6
+
+
+# =============================
+# Derived Metrics
+# =============================
+def dew_point(temp, humidity):
+    """
+    Dew point in °C from temperature (°C) and relative humidity (%),
+    using the Magnus formula. Works on scalars and arrays.
+    """
+    a, b = 17.62, 243.12
+    rh = np.clip(np.asarray(humidity, dtype=np.float64), 1, 100)
+    gamma = np.log(rh / 100.0) + a * temp / (b + temp)
+    return b * gamma / (a - gamma)
+
+
+def apparent_temperature(temp, humidity, wind_speed):
+    """
+    Feels-like temperature in °C (Australian BoM formula) from temperature
+    (°C), relative humidity (%) and wind speed (m/s).
+    """
+    vapour_pressure = np.asarray(humidity, dtype=np.float64) / 100.0 * 6.105 * np.exp(17.27 * temp / (237.7 + temp))
+    return temp + 0.33 * vapour_pressure - 0.70 * wind_speed - 4.00
+
+
+# =============================
+# Forecast Matrix
+# =============================
+@dataclass(frozen=True, slots=True)
+class ForecastArrays:
+    """
+    Forecasts of several cities stacked into 2-D arrays, one row per city.
+    Rows shorter than the longest forecast are padded: ``valid`` marks
+    the real slots.
+    """
+    timestamps: np.ndarray     # int64, seconds (UTC)
+    temperature: np.ndarray    # float64, °C
+    humidity: np.ndarray       # float64, %
+    wind_speed: np.ndarray     # float64, m/s
+    precipitation: np.ndarray  # float64, mm per 3 hours
+    valid: np.ndarray          # bool
+
+    @classmethod
+    def from_forecasts(cls, forecasts) -> "ForecastArrays":
+        """
+        Stack model.Forecast objects. The per-field arrays are read
+        through the buffer protocol, without going through Python objects.
+        """
+        forecasts = list(forecasts)
+        n = len(forecasts)
+        width = max((len(f) for f in forecasts), default=0)
+
+        timestamps = np.zeros((n, width), dtype=np.int64)
+        temperature = np.full((n, width), np.nan)
+        humidity = np.full((n, width), np.nan)
+        wind_speed = np.full((n, width), np.nan)
+        precipitation = np.zeros((n, width))
+        valid = np.zeros((n, width), dtype=bool)
+
+        for row, forecast in enumerate(forecasts):
+            k = len(forecast)
+            if not k:
+                continue
+            timestamps[row, :k] = np.frombuffer(forecast.timestamps, dtype=np.int64)
+            temperature[row, :k] = np.frombuffer(forecast.temperatures, dtype=np.float64)
+            humidity[row, :k] = np.frombuffer(forecast.humidity, dtype=np.uint8)
+            wind_speed[row, :k] = np.frombuffer(forecast.wind_speed, dtype=np.float64)
+            precipitation[row, :k] = np.frombuffer(forecast.precipitation, dtype=np.float64)
+            valid[row, :k] = True
+
+        return cls(timestamps, temperature, humidity, wind_speed, precipitation, valid)
+
+
+# =============================
+# Daily Summaries
+# =============================
+@dataclass(frozen=True, slots=True)
+class DailySummary:
+    """
+    Per-day aggregates for many cities: every field is an array of shape
+    (cities, MAX_DAYS). Days without any forecast slot hold NaN and have a
+    ``slots`` count of 0.
+    """
+    day_start: np.ndarray         # int64, UTC midnight of each day
+    slots: np.ndarray             # int64, number of 3-hour slots in the day
+    temp_min: np.ndarray
+    temp_max: np.ndarray
+    temp_mean: np.ndarray
+    humidity_mean: np.ndarray
+    wind_max: np.ndarray
+    precipitation: np.ndarray     # total mm
+    dew_point_mean: np.ndarray
+    feels_like_min: np.ndarray
+    feels_like_max: np.ndarray
+
+    def rows(self, city: int = 0) -> list[dict]:
+        """
+        Return the days of one city as plain dicts, for display.
+        """
+        days = []
+        for d in range(self.slots.shape[1]):
+            if not self.slots[city, d]:
+                continue
+            days.append({
+                "date":           datetime.fromtimestamp(int(self.day_start[city, d]), timezone.utc).date(),
+                "temp_min":       float(self.temp_min[city, d]),
+                "temp_max":       float(self.temp_max[city, d]),
+                "temp_mean":      float(self.temp_mean[city, d]),
+                "humidity_mean":  float(self.humidity_mean[city, d]),
+                "wind_max":       float(self.wind_max[city, d]),
+                "precipitation":  float(self.precipitation[city, d]),
+                "dew_point_mean": float(self.dew_point_mean[city, d]),
+                "feels_like_min": float(self.feels_like_min[city, d]),
+                "feels_like_max": float(self.feels_like_max[city, d]),
+            })
+        return days
+
+
+def summarize_days(forecasts) -> DailySummary:
+    """
+    Compute per-day aggregates and derived metrics for one or many forecasts.
+
+    Args:
+        forecasts: A model.Forecast, a list of them, or ForecastArrays.
+
+    Returns:
+        DailySummary: One row per city, one column per UTC calendar day.
+    """
+    if isinstance(forecasts, ForecastArrays):
+        arrays = forecasts
+    elif hasattr(forecasts, "timestamps"):
+        arrays = ForecastArrays.from_forecasts([forecasts])
+    else:
+        arrays = ForecastArrays.from_forecasts(forecasts)
+
+    n = arrays.timestamps.shape[0]
+    cells = n * MAX_DAYS
+
+    # Day of each slot, relative to the first day of its city
+    day_number = arrays.timestamps // SECONDS_PER_DAY
+    if day_number.shape[1]:
+        first_day = day_number[:, :1]
+    else:
+        first_day = np.zeros((n, 1), dtype=np.int64)
+    day_index = day_number - first_day
+    valid = arrays.valid & (day_index >= 0) & (day_index < MAX_DAYS)
+
+    rows = np.broadcast_to(np.arange(n)[:, None], day_index.shape)
+    cell = (rows * MAX_DAYS + day_index)[valid]
+
+    def _sum(values):
+        return np.bincount(cell, weights=values[valid], minlength=cells).reshape(n, MAX_DAYS)
+
+    def _reduce(ufunc, values, initial):
+        out = np.full(cells, initial)
+        ufunc.at(out, cell, values[valid])
+        return out.reshape(n, MAX_DAYS)
+
+    slots = np.bincount(cell, minlength=cells).reshape(n, MAX_DAYS)
+    empty = slots == 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        def _mean(values):
+            return np.where(empty, np.nan, _sum(values) / slots)
+
+        def _min(values):
+            return np.where(empty, np.nan, _reduce(np.minimum, values, np.inf))
+
+        def _max(values):
+            return np.where(empty, np.nan, _reduce(np.maximum, values, -np.inf))
+
+        dew = dew_point(arrays.temperature, arrays.humidity)
+        feels = apparent_temperature(arrays.temperature, arrays.humidity, arrays.wind_speed)
+
+        return DailySummary(
+            day_start=(first_day + np.arange(MAX_DAYS)) * SECONDS_PER_DAY,
+            slots=slots,
+            temp_min=_min(arrays.temperature),
+            temp_max=_max(arrays.temperature),
+            temp_mean=_mean(arrays.temperature),
+            humidity_mean=_mean(arrays.humidity),
+            wind_max=_max(arrays.wind_speed),
+            precipitation=np.where(empty, np.nan, _sum(arrays.precipitation)),
+            dew_point_mean=_mean(dew),
+            feels_like_min=_min(feels),
+            feels_like_max=_max(feels),
+        )
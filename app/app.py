@@ -2,9 +2,51 @@
 # STREAMLIT APP: Weather Checker UI (app.py)
 # ==========================================
 
+import os
+import pandas as pd
 import streamlit as st
 from datetime import datetime
-from main import load_api_key, fetch_weather, extract_weather_info
+from analytics import summarize_days
+from city_index import get_city_index
+from history import downsample
+from metrics import registry
+from render import (
+    build_city_card_html, build_daily_summary_html, build_day_html, build_status_card_html,
+    description_translations, format_date_heading, group_forecast_by_day, prepare_forecast, weather_emojis,
+)
+from scheduler import INTERACTIVE
+from units import UNIT_SYSTEMS, convert_report, convert_summary
+from weather import (
+    UNAVAILABLE, ensure_started, extract_weather_info, failure_reason, fetch_weather_many, get_history,
+    lookup_weather,
+)
+
+# =============================
+# CONFIGURATION: Load API Key
+# =============================
+def load_api_key():
+    """
+    Load the OpenWeatherMap API key from Streamlit secrets.
+
+    Returns:
+        str: The API key used for authenticating API requests.
+    """
+
+    return st.secrets["api_key"]
+
+# WEATHER_DEBUG_PANEL=on shows the metrics in the Streamlit sidebar
+DEBUG_PANEL = os.environ.get("WEATHER_DEBUG_PANEL", "off") == "on"
+
+# Cities compared at once, cards per row, and forecast slots fetched per
+# card (the next 24 hours). Each city costs two calls of the shared quota.
+COMPARE_MAX_CITIES = int(os.environ.get("WEATHER_COMPARE_MAX_CITIES", 12))
+COMPARE_COLUMNS = 3
+COMPARE_SLOTS = 8
+
+# The server lives on between sessions, so the cache is warmed and the
+# metrics exporters are started on the first script run rather than the
+# first lookup
+ensure_started(warm=True)
 
 # ================================
 # Custom Page Width – Full Width
@@ -56,9 +98,32 @@ with col1:
     st.markdown("**Select Language / שפה**")
     language = st.selectbox("", ["English", "עברית"], key="lang_select")
 
+    # Results are kept in metric and converted on display, so switching
+    # units never fetches again
+    st.markdown("**Units / יחידות**")
+    units_name = st.selectbox("", list(UNIT_SYSTEMS), format_func=lambda name: UNIT_SYSTEMS[name].label,
+                              key="units_select")
+    units = UNIT_SYSTEMS[units_name]
+
 with col2:
-    st.markdown("**City / עיר**")
-    city = st.text_input("", key="city_input")
+    compare = st.toggle("Compare cities / השוואת ערים", key="compare_mode")
+    if compare:
+        st.markdown(f"**Cities, one per line (up to {COMPARE_MAX_CITIES}) / ערים, אחת בכל שורה**")
+        city = st.text_area("", key="compare_input")
+    else:
+        st.markdown("**City / עיר**")
+        city = st.text_input("", key="city_input")
+
+        # Autocomplete from the local city index, when one has been built.
+        # Nothing is preselected: the typed text is looked up as it is (an
+        # ambiguous name is geocoded by OpenWeatherMap) unless a city is picked.
+        city_index = get_city_index()
+        suggestions = city_index.complete(city) if city_index is not None and city.strip() else []
+        if suggestions:
+            picked = st.selectbox("", suggestions, index=None, format_func=lambda c: c.label,
+                                  placeholder="Pick a suggestion (optional) / בחירת הצעה", key="city_suggestion")
+            if picked is not None:
+                city = picked
 
 
 # Weather Check Button
@@ -76,6 +141,8 @@ texts = {
     "English": {
         "button": "Check Weather",
         "not_found": "City not found! Please try again.",
+        "unavailable": "The weather service is busy or unreachable right now. Please try again in a minute.",
+        "bad_api_key": "The weather service rejected this app's API key. Please check the api_key setting.",
         "weather": "Weather in {city}, {country}:",
         "temperature": "Temperature",
         "humidity": "Humidity",
@@ -83,6 +150,8 @@ texts = {
     "עברית": {
         "button": "בדיקת התחזית היומית",
         "not_found": "העיר לא נמצאה! נא לנסות שוב.",
+        "unavailable": "שירות מזג האוויר עמוס או לא זמין כרגע. נא לנסות שוב בעוד דקה.",
+        "bad_api_key": "שירות מזג האוויר דחה את מפתח ה־API של האפליקציה. נא לבדוק את ההגדרה api_key.",
         "weather": " התחזית היומית בעיר {city}, {country}:",
         "temperature": "הטמפרטורה בשעות הקרובות",
         "humidity": "הלחות בשעות הקרובות",
@@ -100,34 +169,6 @@ else:
     direction = "ltr"
     align = "left"
 
-# ================================
-# Weather Description Translations
-# ================================
-
-description_translations = {
-    "clear sky": "שמיים בהירים",
-    "few clouds": "מעונן קלות",
-    "scattered clouds": "מעונן חלקית",
-    "broken clouds": "מעונן",
-    "shower rain": "גשם מקומי",
-    "rain": "גשם",
-    "thunderstorm": "סופת רעמים",
-    "snow": "שלג",
-    "mist": "ערפל",
-}
-# Weather Emojis by Description
-weather_emojis = {
-    "clear sky": "☀️",
-    "few clouds": "🌤️",
-    "scattered clouds": "⛅",
-    "broken clouds": "☁️",
-    "shower rain": "🌦️",
-    "rain": "🌧️",
-    "thunderstorm": "🌩️",
-    "snow": "❄️",
-    "mist": "🌫️",
-}
-
 # =========================================
 # Display main title with emoji and Info Box
 # =========================================
@@ -192,257 +233,331 @@ st.markdown(app_html[language], unsafe_allow_html=True)
 
 user_city = city
 
-# ======================================
-# Fetch and Display Weather Information
-# ======================================
 
-api_key = load_api_key()
+# ==========================================
+# Rendering – one function per page section
+# ==========================================
 
-if clicked:
-    # API Response and data extraction
-    data = fetch_weather(user_city, api_key)
-    #st.write("API response:", data)
-    if not data:
-        st.warning(f"⚠️ {texts[language]['not_found']}")
-        st.stop()
+def render_weather_title(weather_info, language):
+    """
+    Display dynamic second title with weather emoji and city/country.
+    """
+    emoji = weather_emojis.get(weather_info.description, "🌤️")
+
+    if language == "עברית":
+        city_country = f"<span dir='ltr'>{weather_info.city}, {weather_info.country}</span>"
+        dynamic_title = f"  {emoji} {city_country} התחזית להיום ב"
     else:
-        weather_info = extract_weather_info(data)
+        dynamic_title = f"The forecast today in {weather_info.city}, {weather_info.country} is: {emoji}"
 
-        # Display dynamic second title with weather emoji and city/country
-        emoji = weather_emojis.get(weather_info['description'], "🌤️")
+    st.markdown(
+        f"<h2 style='text-align:center; color:#6A0DAD; font-size:36px;'>{dynamic_title}</h2>",
+        unsafe_allow_html=True
+    )
 
-        if language == "עברית":
-            city_country = f"<span dir='ltr'>{weather_info['city']}, {weather_info['country']}</span>"
-            dynamic_title = f"  {emoji} {city_country} התחזית להיום ב"
-        else:
-            dynamic_title = f"The forecast today in {weather_info['city']}, {weather_info['country']} is: {emoji}"
 
-        st.markdown(
-            f"<h2 style='text-align:center; color:#6A0DAD; font-size:36px;'>{dynamic_title}</h2>",
-            unsafe_allow_html=True
-        )
+def render_date_and_time(language):
+    """
+    Display today's date and the current time, aligned per language.
+    """
+    now = datetime.now().strftime("%H:%M")
+    today_str = datetime.now().strftime("%A, %d %B %Y")
+
+    st.divider()
+
+    # Display date and time – aligned
+    if language == "עברית":
+        st.markdown(f"""
+            <p style='font-size: 24px; font-weight: bold; margin: 0; direction: rtl; text-align: right;'>
+                התאריך היום: {today_str}
+            </p>
+            <p style='font-size: 28px; font-weight: bold; margin: 0; direction: rtl; text-align: right;'>
+                השעה עכשיו היא: {now} 🕒
+            </p>
+        """, unsafe_allow_html=True)
+    else:
+        st.markdown(f"""
+            <p style='font-size: 22px; font-weight: bold; margin: 0; text-align: left;'>
+                Today is {today_str}
+            </p>
+            <p style='font-size: 22px; font-weight: bold; margin: 0; text-align: left;'>
+                Current time: {now} 🕒
+            </p>
+        """, unsafe_allow_html=True)
+
+
+def render_info_bar(weather_info, language, units):
+    """
+    Weather Info Bar – Horizontal display of key metrics.
+    """
+    # Translate description if needed
+    description = weather_info.description
+    if language == "עברית":
+        description = description_translations.get(description, description)
+    wind_label = "כיוון הרוח" if language == "עברית" else "Wind Direction"
+
+    # Get emoji
+    emoji = weather_emojis.get(weather_info.description, "🌤️")
+
+    # Build info bar with styled layout
+    col1, col2, col3, col4 = st.columns(4)
+
+    # Weather description
+    with col1:
+        st.markdown(f"""
+                        <div style='display: flex; flex-direction: column; align-items: center;'>
+                            <div style='font-size: 52px;'>{emoji}</div>
+                            <div style='font-size: 24px; font-weight: bold;'>{description}</div>
+                        </div>
+                    """, unsafe_allow_html=True)
+
+    # Temperature
+    with col2:
+        st.markdown("""
+                        <div style='display: flex; flex-direction: column; align-items: center;'>
+                            <div style='font-size: 52px;'>🌡️</div>
+                            <div style='font-size: 32px; font-weight: bold;'>""" + f"{weather_info.temperature:.1f}{units.temperature.symbol}" + """</div>
+                            <div style='font-size: 20px; font-weight: 600;'>""" + texts[language]["temperature"] + """</div>
+                        </div>
+                    """, unsafe_allow_html=True)
+
+    # Humidity
+    with col3:
+        st.markdown("""
+            <div style='display: flex; flex-direction: column; align-items: center;'>
+                <div style='font-size: 52px;'>💧</div>
+                <div style='font-size: 32px; font-weight: bold;'>""" + f"{weather_info.humidity}%" + """</div>
+                <div style='font-size: 20px; font-weight: 600;'>""" + texts[language]["humidity"] + """</div>
+            </div>
+        """, unsafe_allow_html=True)
+
+    # Wind Direction
+    with col4:
+        st.markdown("""
+            <div style='display: flex; flex-direction: column; align-items: center;'>
+                <div style='font-size: 52px;'>🌬️</div>
+                <div style='font-size: 32px; font-weight: bold;'>""" + f"{weather_info.wind_deg}°" + """</div>
+                <div style='font-size: 20px; font-weight: 600;'>""" + wind_label + """</div>
+            </div>
+        """, unsafe_allow_html=True)
+
+    st.divider()
+
+
+def render_daily_summary(daily_summary, language, units):
+    """
+    Daily Summary – low/high, feels-like, humidity, wind and precipitation per day.
+    """
+    st.markdown(build_daily_summary_html(daily_summary, language, units), unsafe_allow_html=True)
+    st.divider()
+
+
+def render_history(weather_info, language, units, days=30):
+    """
+    Observed History – chart of recorded temperature and humidity for the city.
+    """
+    weather_history = get_history()
+    if weather_history is None or not weather_info.city_id:
+        return
+    end = int(datetime.now().timestamp()) + 1
+    records = weather_history.query(weather_info.city_id, end - days * 86400, end)
+    if len(records) < 2:
+        return
+
+    # Keep the chart to a few hundred points, whatever the span
+    span = int(records["ts"][-1] - records["ts"][0])
+    series = downsample(records, max(3600, span // 300))
+
+    title = (
+        f"📈 Observed in the last {days} days"
+        if language == "English"
+        else f"📈 מה נמדד ב־{days} הימים האחרונים"
+    )
+    st.markdown(
+        f"<h3 style='text-align:{align}; direction:{direction}; color:#4a148c; font-size:28px;'>{title}</h3>",
+        unsafe_allow_html=True
+    )
+    symbol = units.temperature.symbol
+    if language == "עברית":
+        temp_label, humidity_label = f"טמפרטורה ({symbol})", "לחות (%)"
+    else:
+        temp_label, humidity_label = f"Temperature ({symbol})", "Humidity (%)"
+    chart = pd.DataFrame(
+        {temp_label: units.temperature.convert(series["temp_mean"]), humidity_label: series["humidity_mean"]},
+        index=pd.to_datetime(series["ts"], unit="s"),
+    )
+    st.line_chart(chart)
+    st.divider()
 
-        # ========================================
-        # Display Time, Temperature & Description
-        # =========================================
-
-        now = datetime.now().strftime("%H:%M")
-        today_str = datetime.now().strftime("%A, %d %B %Y")
-
-        st.divider()
-
-        # Display date and time – aligned
-        if language == "עברית":
-            st.markdown(f"""
-                <p style='font-size: 24px; font-weight: bold; margin: 0; direction: rtl; text-align: right;'>
-                    התאריך היום: {today_str}
-                </p>
-                <p style='font-size: 28px; font-weight: bold; margin: 0; direction: rtl; text-align: right;'>
-                    השעה עכשיו היא: {now} 🕒
-                </p>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-                <p style='font-size: 22px; font-weight: bold; margin: 0; text-align: left;'>
-                    Today is {today_str}
-                </p>
-                <p style='font-size: 22px; font-weight: bold; margin: 0; text-align: left;'>
-                    Current time: {now} 🕒
-                </p>
-            """, unsafe_allow_html=True)
-
-        #======================================================
-        # Weather Info Bar – Horizontal display of key metrics
-        #======================================================
-
-        # Translate description if needed
-        description = weather_info['description']
-        if language == "עברית":
-            description = description_translations.get(description, description)
-            wind_label = "כיוון הרוח"
-            temp_label = "הטמפרטורה בשעות הקרובות"
-            humidity_label = "הלחות בשעות הקרובות"
-        else:
-            wind_label = "Wind Direction"
-            temp_label = "Temperature in upcoming hours"
-            humidity_label = "Humidity in upcoming hours"
-
-        # Get emoji
-        emoji = weather_emojis.get(weather_info['description'], "🌤️")
-
-        # Build info bar with styled layout
-        col1, col2, col3, col4 = st.columns(4)
-
-        # Weather description
-        with col1:
-            description = weather_info['description']
-            if language == "עברית":
-                description = description_translations.get(description, description)
-            emoji = weather_emojis.get(weather_info['description'], "🌤️")
-            st.markdown(f"""
-                            <div style='display: flex; flex-direction: column; align-items: center;'>
-                                <div style='font-size: 52px;'>{emoji}</div>
-                                <div style='font-size: 24px; font-weight: bold;'>{description}</div>
-                            </div>
-                        """, unsafe_allow_html=True)
-
-        # Temperature
-        with col2:
-            st.markdown("""
-                            <div style='display: flex; flex-direction: column; align-items: center;'>
-                                <div style='font-size: 52px;'>🌡️</div>
-                                <div style='font-size: 32px; font-weight: bold;'>""" + f"{weather_info['temperature']}°C" + """</div>
-                                <div style='font-size: 20px; font-weight: 600;'>""" + texts[language]["temperature"] + """</div>
-                            </div>
-                        """, unsafe_allow_html=True)
-
-        # Humidity
-        with col3:
-            st.markdown("""
-                <div style='display: flex; flex-direction: column; align-items: center;'>
-                    <div style='font-size: 52px;'>💧</div>
-                    <div style='font-size: 32px; font-weight: bold;'>""" + f"{weather_info['humidity']}%" + """</div>
-                    <div style='font-size: 20px; font-weight: 600;'>""" + texts[language]["humidity"] + """</div>
-                </div>
-            """, unsafe_allow_html=True)
-        # Wind Direction
-        with col4:
-            wind_label = "כיוון הרוח" if language == "עברית" else "Wind Direction"
-            st.markdown("""
-                <div style='display: flex; flex-direction: column; align-items: center;'>
-                    <div style='font-size: 52px;'>🌬️</div>
-                    <div style='font-size: 32px; font-weight: bold;'>""" + f"{weather_info['wind_deg']}°" + """</div>
-                    <div style='font-size: 20px; font-weight: 600;'>""" + wind_label + """</div>
-                </div>
-            """, unsafe_allow_html=True)
-
-        st.divider()
-
-        # ================================
-        # Forecast Display – 5 Days Ahead
-        # ================================
-
-        forecast_title = (
-            "📅 5-Day Forecast (3-hour intervals)"
-            if language == "English"
-            else "📅 תחזית ל־5 ימים (במקטעים של 3 שעות)"
-        )
 
-        st.markdown(
-            f"<h3 style='text-align:{align}; direction:{direction}; color:#4a148c; font-size:28px;'>{forecast_title}</h3>",
-            unsafe_allow_html=True
+def render_forecast(forecast_rows, language, units):
+    """
+    Forecast Display – 5 Days Ahead, from rows built by prepare_forecast.
+    """
+    forecast_title = (
+        "📅 5-Day Forecast (3-hour intervals)"
+        if language == "English"
+        else "📅 תחזית ל־5 ימים (במקטעים של 3 שעות)"
+    )
+
+    st.markdown(
+        f"<h3 style='text-align:{align}; direction:{direction}; color:#4a148c; font-size:28px;'>{forecast_title}</h3>",
+        unsafe_allow_html=True
+    )
+
+    st.markdown("<hr style='border: 1px solid #ccc;'>", unsafe_allow_html=True)
+
+    # Render forecast entries – (next 5 days) – one collapsible section per
+    # day. Only the first day is built up front; the rows of later days are
+    # built from the stored forecast when their section is opened.
+    for day_idx, (date_only, day_rows) in enumerate(group_forecast_by_day(forecast_rows)):
+        opened = st.toggle(
+            format_date_heading(day_rows[0]["dt"], language),
+            value=(day_idx == 0),
+            key=f"forecast_day_{date_only.isoformat()}",
         )
+        if opened:
+            st.markdown(
+                f"<div style='direction:{direction};'>{build_day_html(day_rows, language, units)}</div>",
+                unsafe_allow_html=True
+            )
 
-        st.markdown("<hr style='border: 1px solid #ccc;'>", unsafe_allow_html=True)
-
-        # Render forecast entries – (next 5 days)
-        last_date = None  # Track last date to group by day
-
-        for idx, entry in enumerate(weather_info["forecast"][:40]):
-            forecast_time = entry["dt_txt"]
-            dt = datetime.strptime(forecast_time, "%Y-%m-%d %H:%M:%S")
-            date_only = dt.date()
-            hour_only = dt.strftime("%H:%M")
-            temp = entry["main"]["temp"]
-            description = entry["weather"][0]["description"]
-            icon_code = entry["weather"][0]["icon"]
-            icon_url = f"https://openweathermap.org/img/wn/{icon_code}@2x.png"
-
-            # Translate description if needed
-            if language == "עברית":
-                description = description_translations.get(description, description)
-
-            # Add new date heading if it's a new date
-
-            # Hebrew date format, compatible with Windows
-            weekday_names = {
-                "Sunday": "יום ראשון",
-                "Monday": "יום שני",
-                "Tuesday": "יום שלישי",
-                "Wednesday": "יום רביעי",
-                "Thursday": "יום חמישי",
-                "Friday": "יום שישי",
-                "Saturday": "יום שבת"
-            }
-
-            month_names = {
-                "January": "ינואר",
-                "February": "פברואר",
-                "March": "מרץ",
-                "April": "אפריל",
-                "May": "מאי",
-                "June": "יוני",
-                "July": "יולי",
-                "August": "אוגוסט",
-                "September": "ספטמבר",
-                "October": "אוקטובר",
-                "November": "נובמבר",
-                "December": "דצמבר"
-            }
-
-            dt = datetime.strptime(forecast_time, "%Y-%m-%d %H:%M:%S")
-            if date_only != last_date:
-                last_date = date_only
-                if language == "עברית":
-                    hebrew_date = f"{weekday_names[dt.strftime('%A')]}, {dt.day} ב{month_names[dt.strftime('%B')]}"
-                    date_heading = f"📆 {hebrew_date}"
-                else:
-                    date_heading = f"📆 {dt.strftime('%A')}, {dt.strftime('%B')} {dt.day}"
-
-
-                st.markdown(
-                    f"<h4 style='margin-top:24px; margin-bottom:6px; color:#6A0DAD; direction:{direction}; text-align:{align};'>{date_heading}</h4>",
-                    unsafe_allow_html=True
-                )
-
-            # Alternate row background color
-            bg_color = "#f9f9f9" if idx % 2 == 0 else "#eeeeee"
-
-            with st.container():
-                st.markdown(
-                    f"<div style='background-color:{bg_color}; padding:10px; border-radius:10px;'>",
-                    unsafe_allow_html=True
-                )
-
-                col1, col2, col3 = st.columns([1, 2, 5])
-
-                with col1:
-                    # Get matching emoji for description
-                    emoji = weather_emojis.get(description, "🌤️")
-
-                    # Display emoji as icon
-                    st.markdown(
-                        f"<div style='font-size: 36px; text-align: center;'>{emoji}</div>",
-                        unsafe_allow_html=True
-                    )
-
-                with col2:
-                    # Forecast time
-                    with col2:
-
-                        # Convert full timestamp to hour only
-                        hour_only = datetime.strptime(forecast_time, "%Y-%m-%d %H:%M:%S").strftime("%H:%M")
-
-                        # Display centered large hour
-                        st.markdown(
-                            f"<div style='font-size: 28px; font-weight: bold; text-align: center;'>{hour_only}</div>",
-                            unsafe_allow_html=True
-                        )
-
-                with col3:
-                    # Description and temperature
-                    st.markdown(
-                        f"<div style='font-size: 18px; direction:{direction}; text-align:{align};'>"
-                        f"{description}, <strong>{temp:.1f}°C</strong>"
-                        f"</div>",
-                        unsafe_allow_html=True
-                    )
-
-            st.markdown("<div style='margin-top:8px;'></div>", unsafe_allow_html=True)
-
-        st.divider()
+    st.divider()
 
 
+def prepare_view(units):
+    """
+    The stored result in ``units``: (weather info, forecast rows, daily
+    summary rows). Built once per result and unit system, so switching
+    back and forth only converts once.
+    """
+    views = st.session_state["views"]
+    if units.name not in views:
+        with registry.span("prepare"):
+            weather_info = convert_report(st.session_state["weather_info"], units)
+            views[units.name] = (
+                weather_info,
+                prepare_forecast(weather_info.forecast),
+                convert_summary(st.session_state["daily_summary"], units).rows(),
+            )
+    return views[units.name]
+
+
+def comparison_placeholders(queries):
+    """
+    Lay out the comparison grid up front, one empty slot per city in input
+    order, so each card can be filled in whenever its lookup finishes.
+    """
+    placeholders = {}
+    for start in range(0, len(queries), COMPARE_COLUMNS):
+        row = queries[start:start + COMPARE_COLUMNS]
+        for column, query in zip(st.columns(COMPARE_COLUMNS), row):
+            placeholders[query] = column.empty()
+    return placeholders
 
 
+def render_card(placeholder, query, report, reason, language, units):
+    """
+    City Comparison – fill one card, or mark why the lookup failed
+    (``reason`` is weather.NOT_FOUND, BAD_API_KEY or UNAVAILABLE).
+    """
+    if report is None:
+        html = build_status_card_html(query, language, reason)
+    else:
+        html = build_city_card_html(convert_report(report, units), language, units, COMPARE_SLOTS)
+    placeholder.markdown(html, unsafe_allow_html=True)
+
+
+def render_comparison(queries, api_key, language, units):
+    """
+    City Comparison – fetch every city and render its card as soon as its
+    lookup finishes, in whatever order they finish, so the first card does
+    not wait for the slowest city. Returns (report, failure reason) by city.
+    """
+    placeholders = comparison_placeholders(queries)
+    for query, placeholder in placeholders.items():
+        placeholder.markdown(build_status_card_html(query, language, "loading"), unsafe_allow_html=True)
+
+    results = {}
+    for query, data, error in fetch_weather_many(queries, api_key, priority=INTERACTIVE, horizon=COMPARE_SLOTS):
+        results[query] = (data, None if error is None else failure_reason(error))
+        render_card(placeholders[query], query, *results[query], language, units)
+    return results
+
+
+# ======================================
+# Fetch and Display Weather Information
+# ======================================
 
+api_key = load_api_key()
+
+if compare:
+    if clicked:
+        queries = list(dict.fromkeys(line.strip() for line in city.splitlines() if line.strip()))
+        queries = queries[:COMPARE_MAX_CITIES]
+        st.session_state.pop("comparison", None)
+        with registry.span("render_comparison"):
+            results = render_comparison(queries, api_key, language, units)
+        st.session_state["comparison"] = (queries, results)
+    elif "comparison" in st.session_state:
+        # Reruns (e.g. a language or units change) re-render from memory
+        queries, results = st.session_state["comparison"]
+        for query, placeholder in comparison_placeholders(queries).items():
+            render_card(placeholder, query, *results.get(query, (None, UNAVAILABLE)), language, units)
+
+elif clicked:
+    # API Response and data extraction
+    data, error = lookup_weather(user_city, api_key)
+    #st.write("API response:", data)
+    if not data:
+        st.session_state.pop("weather_info", None)
+        st.session_state.pop("daily_summary", None)
+        st.session_state.pop("views", None)
+        st.warning(f"⚠️ {texts[language][failure_reason(error)]}")
+        st.stop()
+    else:
+        # Keep the result for this session, so reruns triggered by other
+        # widgets (e.g. the language selectbox) re-render it from memory
+        weather_info = extract_weather_info(data)
+        st.session_state["weather_info"] = weather_info
+        with registry.span("prepare"):
+            st.session_state["daily_summary"] = summarize_days(weather_info.forecast)
+        st.session_state["views"] = {}
+
+if not compare and "weather_info" in st.session_state:
+    weather_info, forecast_rows, daily_summary = prepare_view(units)
+    with registry.span("render_page"):
+        render_weather_title(weather_info, language)
+        render_date_and_time(language)
+        render_info_bar(weather_info, language, units)
+        render_daily_summary(daily_summary, language, units)
+        with registry.span("render_history"):
+            render_history(weather_info, language, units)
+        with registry.span("render_forecast"):
+            render_forecast(forecast_rows, language, units)
+
+
+# ===============================
+# Debug Panel (WEATHER_DEBUG_PANEL)
+# ===============================
+
+def render_debug_panel():
+    """
+    Sidebar with the process-wide lookup metrics: phase timings, counters
+    and cache/quota state.
+    """
+    snapshot = registry.snapshot()
+    with st.sidebar:
+        st.markdown("### 🛠️ Metrics")
+        timings = pd.DataFrame.from_dict(snapshot["histograms"], orient="index")
+        if not timings.empty:
+            st.markdown("**Timings (s)**")
+            st.dataframe(timings.sort_index(), use_container_width=True)
+        counters = {**snapshot["counters"], **snapshot["gauges"]}
+        if counters:
+            st.markdown("**Counters**")
+            st.dataframe(pd.Series(counters, name="value").sort_index(), use_container_width=True)
+
+
+if DEBUG_PANEL:
+    render_debug_panel()
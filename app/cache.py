@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+
+# =============================
+# Cache Lookup Outcomes
+# =============================
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+# =============================
+#  TTL Cache with LRU Eviction
+# =============================
+class TTLCache:
+    """
+    Thread-safe, bounded in-process cache with a time-to-live per entry.
+
+    Entries younger than ``ttl`` are fresh. Entries between ``ttl`` and
+    ``ttl + grace`` are stale: they are still served, and the caller is
+    expected to refresh them in the background with ``refresh_async``.
+    Older entries count as misses. When the cache is full, the least
+    recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300, grace: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.grace = grace
+        self._data = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._executor = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        """
+        Look up a key.
+
+        Returns:
+            tuple: (value, outcome) where outcome is FRESH, STALE or MISS.
+                The value is None on a miss.
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None, MISS
+
+            stored_at, value = item
+            age = now - stored_at
+            if age >= self.ttl + self.grace:
+                del self._data[key]
+                self.misses += 1
+                return None, MISS
+
+            self._data.move_to_end(key)
+            if age < self.ttl:
+                self.hits += 1
+                return value, FRESH
+            self.stale_hits += 1
+            return value, STALE
+
+    def expires_in(self, key) -> float | None:
+        """
+        Seconds until an entry stops being fresh (negative once stale), or
+        None if the key is not cached. Does not count as a lookup.
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            return self.ttl - (time.monotonic() - item[0])
+
+    def set(self, key, value, age: float = 0.0):
+        """
+        Store a value, evicting the least recently used entries if needed.
+
+        ``age`` is how many seconds old the value already is, e.g. when
+        warming the cache from a persistent store.
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() - age, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def refresh_async(self, key, loader):
+        """
+        Reload a key in the background with ``loader()``.
+
+        Only one refresh per key runs at a time. If the loader raises or
+        returns None, the current entry is kept as it is.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+        def _refresh():
+            try:
+                value = loader()
+                if value is not None:
+                    self.set(key, value)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(_refresh)
+
+    def clear(self):
+        """
+        Remove all entries. Counters are kept.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        Return the hit/miss/eviction counters and the current size.
+        """
+        with self._lock:
+            return {
+                "hits":       self.hits,
+                "stale_hits": self.stale_hits,
+                "misses":     self.misses,
+                "evictions":  self.evictions,
+                "size":       len(self._data),
+                "maxsize":    self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,419 @@
+# ==================================================
+# CITY INDEX: Offline name lookup (city_index.py)
+# ==================================================
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import sys
+import threading
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+
+# NumPy is imported when an index is first built or loaded, so that
+# importing City and normalize_name (e.g. for a console lookup with no
+# index) stays cheap
+np = None
+
+
+def _numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+# Where the built index lives; build it with:
+#   python app/city_index.py build city.list.json.gz [out_dir]
+DEFAULT_INDEX_DIR = Path(__file__).resolve().parent.parent / "data" / "city_index"
+INDEX_DIR = Path(os.environ.get("CITY_INDEX_DIR", DEFAULT_INDEX_DIR))
+
+# Country codes people type that differ from the ISO codes in the index
+# (OpenWeatherMap's own examples use "London,uk")
+COUNTRY_ALIASES = {"UK": "GB"}
+
+_ARRAYS = ("ids", "coords", "countries", "key_offsets", "keys", "name_offsets", "names")
+
+# Spatial grid: 1° x 1° cells, row-major from the south-west corner
+GRID_ROWS, GRID_COLS = 180, 360
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.195
+
+
+class CityNotFoundError(LookupError):
+    """
+    Raised when a city name does not match any entry of the local index.
+    """
+
+
+# =============================
+# City Record
+# =============================
+@dataclass(frozen=True, slots=True)
+class City:
+    """
+    One entry of the OpenWeatherMap city list.
+    """
+    id: int
+    name: str
+    country: str
+    lat: float
+    lon: float
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}, {self.country}" if self.country else self.name
+
+
+def _grid_cells(coords) -> np.ndarray:
+    """
+    Return the grid cell number of each (lat, lon) row.
+    """
+    rows = np.clip(np.floor(coords[:, 0] + 90).astype(np.int64), 0, GRID_ROWS - 1)
+    cols = np.floor(coords[:, 1] + 180).astype(np.int64) % GRID_COLS
+    return rows * GRID_COLS + cols
+
+
+def _build_grid(coords) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Bucket cities into grid cells.
+
+    Returns:
+        tuple: (order, starts) where ``order`` lists city positions sorted
+            by cell and the cities of cell ``c`` are
+            ``order[starts[c]:starts[c + 1]]``.
+    """
+    cells = _grid_cells(coords)
+    order = np.argsort(cells, kind="stable").astype(np.uint32)
+    starts = np.searchsorted(cells[order], np.arange(GRID_ROWS * GRID_COLS + 1)).astype(np.uint32)
+    return order, starts
+
+
+def haversine_km(lat, lon, lats, lons):
+    """
+    Great-circle distance in km from one point to arrays of points.
+    """
+    _numpy()
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a city name for matching: accents removed, case folded and
+    whitespace collapsed, so "São  Paulo" and "sao paulo" are the same key.
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+# =============================
+# Building the Index
+# =============================
+def build_city_index(source: str | Path, out_dir: str | Path = INDEX_DIR) -> int:
+    """
+    Build the index from an OpenWeatherMap city list (city.list.json,
+    optionally gzipped).
+
+    Cities are sorted by normalized name and stored as flat NumPy arrays,
+    which CityIndex memory-maps instead of loading.
+
+    Returns:
+        int: Number of cities written.
+    """
+    _numpy()
+    source = Path(source)
+    opener = gzip.open if source.suffix == ".gz" else open
+    with opener(source, "rt", encoding="utf-8") as f:
+        cities = json.load(f)
+
+    entries = sorted(
+        ((normalize_name(c["name"]), c) for c in cities if c.get("name")),
+        key=lambda item: (item[0], item[1].get("country", ""), item[1]["id"]),
+    )
+
+    keys = [key.encode("utf-8") for key, _ in entries]
+    names = [c["name"].encode("utf-8") for _, c in entries]
+    arrays = {
+        "ids":          np.array([c["id"] for _, c in entries], dtype=np.uint32),
+        "coords":       np.array([(c["coord"]["lat"], c["coord"]["lon"]) for _, c in entries],
+                                 dtype=np.float32).reshape(-1, 2),
+        "countries":    np.array([c.get("country", "") for _, c in entries], dtype="S2"),
+        "key_offsets":  np.cumsum([0] + [len(k) for k in keys], dtype=np.uint64),
+        "keys":         np.frombuffer(b"".join(keys), dtype=np.uint8),
+        "name_offsets": np.cumsum([0] + [len(n) for n in names], dtype=np.uint64),
+        "names":        np.frombuffer(b"".join(names), dtype=np.uint8),
+    }
+    arrays["grid_order"], arrays["grid_starts"] = _build_grid(arrays["coords"])
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(out_dir / f"{name}.npy", array)
+    return len(entries)
+
+
+# =============================
+# Querying the Index
+# =============================
+def _load_mapped(path: Path) -> np.ndarray:
+    """
+    Memory-map a saved array. The plain ndarray view skips np.memmap's
+    per-index overhead but still reads from the mapped file.
+    """
+    return np.asarray(np.load(path, mmap_mode="r"))
+
+
+class CityIndex:
+    """
+    Read-only city index backed by memory-mapped arrays.
+
+    Names are kept sorted by normalized key, so prefix completion and exact
+    lookups are binary searches over the mapped key blob. Coordinates are
+    bucketed into a 1° grid for nearest-city and bounding-box queries.
+    """
+
+    def __init__(self, path: str | Path = INDEX_DIR):
+        _numpy()
+        path = Path(path)
+        for name in _ARRAYS:
+            setattr(self, f"_{name}", _load_mapped(path / f"{name}.npy"))
+        if (path / "grid_order.npy").exists():
+            self._grid_order = _load_mapped(path / "grid_order.npy")
+            self._grid_starts = _load_mapped(path / "grid_starts.npy")
+        else:
+            # Index built before the grid existed: bucket it in memory
+            self._grid_order, self._grid_starts = _build_grid(self._coords)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _key(self, i: int) -> bytes:
+        return self._keys[int(self._key_offsets[i]):int(self._key_offsets[i + 1])].tobytes()
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def city(self, i: int) -> City:
+        """
+        Return the city stored at position ``i``.
+        """
+        name = self._names[int(self._name_offsets[i]):int(self._name_offsets[i + 1])].tobytes()
+        lat, lon = self._coords[i]
+        return City(
+            id=int(self._ids[i]),
+            name=name.decode("utf-8"),
+            country=self._countries[i].decode("ascii"),
+            lat=float(lat),
+            lon=float(lon),
+        )
+
+    def complete(self, prefix: str, limit: int = 10) -> list[City]:
+        """
+        Return up to ``limit`` cities whose name starts with ``prefix``.
+        """
+        key = normalize_name(prefix).encode("utf-8")
+        if not key:
+            return []
+        matches = []
+        i = self._lower_bound(key)
+        while i < len(self) and len(matches) < limit and self._key(i).startswith(key):
+            matches.append(self.city(i))
+            i += 1
+        return matches
+
+    def lookup(self, name: str, country: str | None = None) -> list[City]:
+        """
+        Return every city whose name matches exactly, optionally filtered by
+        ISO country code.
+        """
+        key = normalize_name(name).encode("utf-8")
+        if not key:
+            return []
+        matches = []
+        i = self._lower_bound(key)
+        while i < len(self) and self._key(i) == key:
+            if country is None or self._countries[i].decode("ascii").upper() == country.upper():
+                matches.append(self.city(i))
+            i += 1
+        return matches
+
+    def resolve(self, text: str) -> list[City]:
+        """
+        Resolve free text in OpenWeatherMap's query forms, "Paris",
+        "Paris,FR" or "Portland,OR,US", to matching cities.
+
+        The index has no states, so only the name and a trailing ISO country
+        code are matched. An empty result for a query with a suffix only
+        means the index cannot tell, e.g. for "Paris, France".
+        """
+        name, *qualifiers = [part.strip() for part in text.split(",")]
+        if not qualifiers:
+            return self.lookup(name)
+        country = qualifiers[-1].upper()
+        country = COUNTRY_ALIASES.get(country, country)
+        if len(country) != 2 or not country.isalpha():
+            return []
+        return self.lookup(name, country)
+
+
+    def _row_span(self, row: int, col_from: int, col_to: int) -> np.ndarray:
+        """
+        City positions in grid row ``row`` between two columns (inclusive).
+        """
+        first = row * GRID_COLS
+        return self._grid_order[int(self._grid_starts[first + col_from]):int(self._grid_starts[first + col_to + 1])]
+
+    def _cols_span(self, row: int, col_from: int, col_to: int) -> list[np.ndarray]:
+        if col_to - col_from + 1 >= GRID_COLS:
+            return [self._row_span(row, 0, GRID_COLS - 1)]
+        col_from %= GRID_COLS
+        col_to %= GRID_COLS
+        if col_from <= col_to:
+            return [self._row_span(row, col_from, col_to)]
+        # Crosses the antimeridian
+        return [self._row_span(row, col_from, GRID_COLS - 1), self._row_span(row, 0, col_to)]
+
+    def _ring(self, row0: int, col0: int, r: int) -> list[np.ndarray]:
+        """
+        City positions in the cells exactly ``r`` cells away from (row0, col0).
+        """
+        if r == 0:
+            return self._cols_span(row0, col0, col0)
+        spans = []
+        for row in (row0 - r, row0 + r):
+            if 0 <= row < GRID_ROWS:
+                spans += self._cols_span(row, col0 - r, col0 + r)
+        # Side columns, unless the previous rings already covered every column
+        if 2 * r - 1 < GRID_COLS:
+            side_cols = {(col0 - r) % GRID_COLS, (col0 + r) % GRID_COLS}
+            for row in range(max(row0 - r + 1, 0), min(row0 + r, GRID_ROWS)):
+                for col in side_cols:
+                    spans.append(self._row_span(row, col, col))
+        return spans
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> list[tuple[City, float]]:
+        """
+        Return the ``k`` cities closest to a point, nearest first.
+
+        Grid rings around the point are searched outwards until the next
+        ring cannot hold anything closer than the k-th city found so far.
+
+        Returns:
+            list: (City, distance in km) pairs; empty when ``k`` is below 1.
+        """
+        if k < 1:
+            return []
+        row0 = min(max(int(np.floor(lat + 90)), 0), GRID_ROWS - 1)
+        col0 = int(np.floor(lon + 180)) % GRID_COLS
+        best_idx = np.empty(0, dtype=np.int64)
+        best_dist = np.empty(0)
+
+        for r in range(max(GRID_ROWS, GRID_COLS)):
+            spans = [span for span in self._ring(row0, col0, r) if len(span)]
+            if spans:
+                new_idx = np.concatenate(spans).astype(np.int64)
+                coords = self._coords[new_idx]
+                new_dist = haversine_km(lat, lon, coords[:, 0], coords[:, 1])
+                best_idx = np.concatenate([best_idx, new_idx])
+                best_dist = np.concatenate([best_dist, new_dist])
+                if len(best_dist) > k:
+                    keep = np.argpartition(best_dist, k - 1)[:k]
+                    best_idx, best_dist = best_idx[keep], best_dist[keep]
+            if len(best_dist) < k:
+                continue
+
+            covered_all = 2 * r + 1 >= GRID_COLS and row0 - r <= 0 and row0 + r >= GRID_ROWS - 1
+            # Anything outside this ring is at least this far away
+            lat_gap = min(lat + 90 - (row0 - r), (row0 + r + 1) - (lat + 90))
+            lon_gap = min(lon + 180 - (col0 - r), (col0 + r + 1) - (lon + 180))
+            widest_lat = min(abs(lat) + r + 1, 90)
+            bound = KM_PER_DEGREE * min(lat_gap, lon_gap * np.cos(np.radians(widest_lat)))
+            if covered_all or best_dist.max() <= bound:
+                order = np.argsort(best_dist)
+                return [(self.city(int(best_idx[i])), float(best_dist[i])) for i in order]
+
+        return []
+
+    def within(self, south: float, west: float, north: float, east: float,
+               limit: int | None = None) -> list[City]:
+        """
+        Return the cities inside a bounding box. ``west > east`` means the
+        box crosses the antimeridian; a box 360° wide or more (a zoomed-out
+        map, e.g. -180 to 180) covers every longitude.
+        """
+        row_from = min(max(int(np.floor(south + 90)), 0), GRID_ROWS - 1)
+        row_to = min(max(int(np.floor(north + 90)), 0), GRID_ROWS - 1)
+        all_longitudes = east - west >= 360
+        if all_longitudes:
+            col_from, col_to = 0, GRID_COLS - 1
+        else:
+            col_from = int(np.floor(west + 180)) % GRID_COLS
+            col_to = int(np.floor(east + 180)) % GRID_COLS
+            if col_to < col_from or (col_to == col_from and west > east):
+                col_to += GRID_COLS
+
+        spans = []
+        for row in range(row_from, row_to + 1):
+            spans += self._cols_span(row, col_from, col_to)
+        if not spans:
+            return []
+        candidates = np.sort(np.concatenate(spans))
+        coords = self._coords[candidates]
+        lats, lons = coords[:, 0], coords[:, 1]
+        inside = (lats >= south) & (lats <= north)
+        if all_longitudes:
+            pass
+        elif west <= east:
+            inside &= (lons >= west) & (lons <= east)
+        else:
+            inside &= (lons >= west) | (lons <= east)
+        positions = candidates[inside][:limit]
+        return [self.city(int(i)) for i in positions]
+
+
+_index = None
+_index_lock = threading.Lock()
+_index_loaded = False
+
+
+def get_city_index() -> CityIndex | None:
+    """
+    Return the process-wide city index, loading it on first use.
+
+    Returns:
+        CityIndex | None: None when no index has been built.
+    """
+    global _index, _index_loaded
+    if not _index_loaded:
+        with _index_lock:
+            if not _index_loaded:
+                if (INDEX_DIR / "ids.npy").exists():
+                    _index = CityIndex(INDEX_DIR)
+                _index_loaded = True
+    return _index
+
+
+# =============
+# RUN
+# =============
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "build":
+        print("Usage: python city_index.py build <city.list.json[.gz]> [out_dir]")
+        sys.exit(1)
+    count = build_city_index(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else INDEX_DIR)
+    print(f"Indexed {count} cities.")
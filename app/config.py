@@ -0,0 +1,88 @@
+# =================================================
+# CONFIGURATION: Settings and secrets (config.py)
+# =================================================
+
+import os
+import threading
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Secrets files read outside Streamlit, lowest precedence first: the same
+# .streamlit/secrets.toml files Streamlit reads (global, then project), so
+# the console and the app share one API key. WEATHER_SECRETS_FILE points at
+# any other file and wins over all of them.
+SECRETS_FILES = [
+    Path.home() / ".streamlit" / "secrets.toml",
+    ROOT_DIR / ".streamlit" / "secrets.toml",
+    Path.cwd() / ".streamlit" / "secrets.toml",
+]
+if os.environ.get("WEATHER_SECRETS_FILE"):
+    SECRETS_FILES.append(Path(os.environ["WEATHER_SECRETS_FILE"]))
+
+_secrets = None
+_secrets_lock = threading.Lock()
+
+
+class ConfigError(LookupError):
+    """
+    Raised when a required setting is in neither the environment nor a
+    secrets file.
+    """
+
+
+def load_secrets() -> dict:
+    """
+    Read and merge the secrets files that exist, once per process.
+
+    Raises:
+        ConfigError: If a secrets file is not valid TOML.
+    """
+    global _secrets
+    if _secrets is None:
+        with _secrets_lock:
+            if _secrets is None:
+                import tomllib
+
+                secrets = {}
+                for path in dict.fromkeys(SECRETS_FILES):
+                    try:
+                        with open(path, "rb") as f:
+                            secrets.update(tomllib.load(f))
+                    except FileNotFoundError:
+                        continue
+                    except tomllib.TOMLDecodeError as e:
+                        raise ConfigError(f"Invalid secrets file {path}: {e}") from e
+                _secrets = secrets
+    return _secrets
+
+
+def get_setting(name: str, env_var: str):
+    """
+    Return a setting from the environment variable ``env_var``, or else
+    from ``name`` in the secrets files.
+
+    Raises:
+        ConfigError: If the setting is in neither.
+    """
+    value = os.environ.get(env_var)
+    if value:
+        return value
+    secrets = load_secrets()
+    if name in secrets:
+        return secrets[name]
+    raise ConfigError(f"Set {env_var} or add {name} to .streamlit/secrets.toml")
+
+
+def load_api_key() -> str:
+    """
+    Load the OpenWeatherMap API key without Streamlit: from OWM_API_KEY,
+    or ``api_key`` in .streamlit/secrets.toml.
+
+    Returns:
+        str: The API key used for authenticating API requests.
+
+    Raises:
+        ConfigError: If no API key is configured.
+    """
+    return get_setting("api_key", "OWM_API_KEY")
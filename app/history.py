@@ -0,0 +1,145 @@
+# ====================================================
+# WEATHER HISTORY: Observed time series (history.py)
+# ====================================================
+
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from model import WeatherReport
+
+# File locks keep appends from several processes (replicas sharing the data
+# directory) in order; fcntl is POSIX-only, so elsewhere only threads are
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# One fixed-width record per observation, packed (21 bytes)
+RECORD_DTYPE = np.dtype([
+    ("ts",         "<i8"),   # Unix timestamp of the observation
+    ("temp",       "<f4"),   # °C
+    ("humidity",   "u1"),    # %
+    ("wind_speed", "<f4"),   # m/s
+    ("wind_deg",   "<u2"),
+    ("code",       "<u2"),   # OpenWeatherMap condition id
+])
+
+
+# =============================
+#  Time-Series Store
+# =============================
+class HistoryStore:
+    """
+    Append-only store of observed current conditions, partitioned into one
+    file of fixed-width records per city.
+
+    Records are appended in time order, so a range query is a binary search
+    over the memory-mapped timestamp column and only the pages in the range
+    are read from disk. Appends hold an exclusive lock on the city's file,
+    so processes sharing the directory cannot interleave them.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, city_id: int) -> Path:
+        return self.root / f"{int(city_id)}.bin"
+
+    @staticmethod
+    def _last_timestamp(f) -> int | None:
+        """
+        Return the timestamp of the last record of an open file, first
+        cutting off a partial record left by an interrupted write.
+        """
+        size = os.fstat(f.fileno()).st_size
+        torn = size % RECORD_DTYPE.itemsize
+        if torn:
+            size -= torn
+            f.truncate(size)
+        if not size:
+            return None
+        f.seek(size - RECORD_DTYPE.itemsize)
+        return int(np.frombuffer(f.read(RECORD_DTYPE.itemsize), dtype=RECORD_DTYPE)["ts"][0])
+
+    def append(self, report: WeatherReport) -> bool:
+        """
+        Record the current conditions of a report.
+
+        Returns:
+            bool: False if the report has no city id or observation time,
+                or is not newer than the last record of its city.
+        """
+        if not report.city_id or not report.observed_at:
+            return False
+        record = np.array(
+            [(report.observed_at, report.temperature, report.humidity,
+              report.wind_speed, report.wind_deg, report.code)],
+            dtype=RECORD_DTYPE,
+        )
+        path = self._path(report.city_id)
+        with self._lock, open(path, "a+b") as f:
+            if fcntl is not None:
+                # Released when the file is closed, after the write is flushed
+                fcntl.flock(f, fcntl.LOCK_EX)
+            last = self._last_timestamp(f)
+            if last is not None and report.observed_at <= last:
+                return False
+            f.write(record.tobytes())
+        return True
+
+    def query(self, city_id: int, start: int, end: int) -> np.ndarray:
+        """
+        Return the records of a city with ``start <= ts < end``.
+
+        The result is a read-only view over the memory-mapped file.
+        """
+        path = self._path(city_id)
+        if not path.exists() or path.stat().st_size < RECORD_DTYPE.itemsize:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        count = path.stat().st_size // RECORD_DTYPE.itemsize
+        records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+        ts = records["ts"]
+        lo, hi = np.searchsorted(ts, [start, end])
+        return records[lo:hi]
+
+    def cities(self) -> list[int]:
+        """
+        Return the ids of every city with recorded history.
+        """
+        return sorted(int(p.stem) for p in self.root.glob("*.bin") if p.stem.isdigit())
+
+
+# =============================
+# Downsampling
+# =============================
+def downsample(records: np.ndarray, interval: int) -> dict:
+    """
+    Aggregate records into buckets of ``interval`` seconds.
+
+    Returns:
+        dict: Arrays keyed by "ts" (bucket start), "temp_mean", "temp_min",
+            "temp_max", "humidity_mean" and "wind_speed_mean".
+    """
+    if not len(records):
+        empty = np.empty(0)
+        return {"ts": np.empty(0, dtype=np.int64), "temp_mean": empty, "temp_min": empty,
+                "temp_max": empty, "humidity_mean": empty, "wind_speed_mean": empty}
+
+    buckets = records["ts"] // interval
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    counts = np.diff(np.r_[starts, len(records)])
+
+    temp = records["temp"].astype(np.float64)
+    return {
+        "ts":              buckets[starts] * interval,
+        "temp_mean":       np.add.reduceat(temp, starts) / counts,
+        "temp_min":        np.minimum.reduceat(temp, starts),
+        "temp_max":        np.maximum.reduceat(temp, starts),
+        "humidity_mean":   np.add.reduceat(records["humidity"].astype(np.float64), starts) / counts,
+        "wind_speed_mean": np.add.reduceat(records["wind_speed"].astype(np.float64), starts) / counts,
+    }
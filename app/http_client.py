@@ -0,0 +1,211 @@
+import json
+import os
+import random
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from metrics import registry
+from scheduler import INTERACTIVE, RateScheduler
+
+# orjson decodes OpenWeatherMap bodies several times faster than the
+# standard library; it is optional and used only when installed.
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# requests is imported on first use (see get_session); annotations only
+if TYPE_CHECKING:
+    import requests
+
+# =============================
+# CONFIGURATION: HTTP Settings
+# =============================
+# (connect, read) timeout in seconds for a single upstream call
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Overall deadline in seconds for a group of calls sent together
+FETCH_DEADLINE = 15
+
+# Connections kept alive per host, and threads used to send calls in parallel
+POOL_SIZE = 32
+
+# OpenWeatherMap quota shared by every upstream call in this process (60 on
+# the free plan; raise OWM_CALLS_PER_MINUTE for paid plans or a local mock)
+CALLS_PER_MINUTE = int(os.environ.get("OWM_CALLS_PER_MINUTE", 60))
+
+# How often a call rejected with 429/503 is retried, and the backoff used
+# when the response has no Retry-After header
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+
+# Longest pause taken from a Retry-After header: the pause holds back every
+# call in the process, so a bogus or huge value must not stall them for long
+MAX_RETRY_AFTER = 60.0
+RETRY_STATUSES = (429, 503)
+
+scheduler = RateScheduler(CALLS_PER_MINUTE)
+
+# requests, the session and the worker threads are set up on the first
+# upstream call, so a console lookup served from the cache or the store
+# never pays for importing them
+_session = None
+_executor = None
+_session_lock = threading.Lock()
+
+
+# ========================
+#  Shared HTTP Session
+# ========================
+def get_session() -> "requests.Session":
+    """
+    Return the process-wide HTTP session.
+
+    The session keeps connections to OpenWeatherMap alive between calls
+    and asks for gzip-compressed responses.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update({
+                    "Accept": "application/json",
+                    "Accept-Encoding": "gzip, deflate",
+                })
+                _session = session
+    return _session
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _session_lock:
+            if _executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="owm-http")
+    return _executor
+
+
+# ==========================
+#  Single and Parallel GETs
+# ==========================
+def get_json(url: str, params: dict, timeout=REQUEST_TIMEOUT,
+             priority: int = INTERACTIVE, deadline: float | None = None) -> dict:
+    """
+    Send one GET request over the shared session and decode the JSON body.
+
+    The raw body is decoded with the fastest available JSON backend.
+
+    Every attempt first takes a token from the shared scheduler. A 429 or
+    503 answer pauses the scheduler for the Retry-After period (or an
+    exponential backoff) and the call is retried.
+
+    The quota wait, time to response headers (including connecting when a
+    new connection is opened), body download and JSON decoding are timed
+    separately per endpoint, and every response is counted by status.
+
+    Args:
+        url: Endpoint to call.
+        params: Query parameters.
+        timeout: (connect, read) timeout for each attempt.
+        priority: INTERACTIVE or BACKGROUND, used when waiting for quota.
+        deadline: time.monotonic() value after which the call gives up.
+
+    Raises:
+        requests.exceptions.RequestException: On connection errors,
+            timeouts, non-2xx responses and exhausted retries.
+    """
+    import requests
+
+    endpoint = url.rstrip("/").rsplit("/", 1)[-1]
+    for attempt in range(MAX_RETRIES + 1):
+        wait_for = None if deadline is None else max(deadline - time.monotonic(), 0)
+        with registry.span("quota_wait", endpoint=endpoint):
+            acquired = scheduler.acquire(priority, timeout=wait_for)
+        if not acquired:
+            registry.inc("weather_upstream_responses_total", endpoint=endpoint, status="quota_timeout")
+            raise requests.exceptions.Timeout("Timed out waiting for API quota")
+
+        start = time.perf_counter()
+        try:
+            resp = get_session().get(url, params=params, timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            registry.inc("weather_upstream_responses_total", endpoint=endpoint, status=type(e).__name__)
+            raise
+        total = time.perf_counter() - start
+        to_headers = resp.elapsed.total_seconds()
+        registry.observe("weather_phase_seconds", to_headers, phase="upstream_headers", endpoint=endpoint)
+        registry.observe("weather_phase_seconds", max(total - to_headers, 0.0), phase="upstream_body", endpoint=endpoint)
+        registry.inc("weather_upstream_responses_total", endpoint=endpoint, status=str(resp.status_code))
+
+        if resp.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+            scheduler.backoff(_retry_delay(resp, attempt))
+            continue
+        resp.raise_for_status()
+        try:
+            with registry.span("decode", endpoint=endpoint):
+                return _loads(resp.content)
+        except ValueError as e:
+            raise requests.exceptions.InvalidJSONError(f"Invalid JSON from {url}: {e}", response=resp)
+
+
+def _retry_delay(resp: "requests.Response", attempt: int) -> float:
+    """
+    Seconds to wait before retrying, from Retry-After (at most
+    MAX_RETRY_AFTER) or exponential backoff.
+    """
+    retry_after = resp.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), MAX_RETRY_AFTER)
+        except ValueError:
+            from email.utils import parsedate_to_datetime
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                return min(max(delay, 0.0), MAX_RETRY_AFTER)
+            except (TypeError, ValueError):
+                pass
+    return BACKOFF_BASE * 2 ** attempt + random.uniform(0, BACKOFF_BASE)
+
+
+def get_json_many(requests_list: list[tuple[str, dict]], deadline: float = FETCH_DEADLINE,
+                  priority: int = INTERACTIVE) -> list[dict]:
+    """
+    Send several GET requests at the same time and wait for all of them.
+
+    Args:
+        requests_list: (url, params) pairs to fetch.
+        deadline: Seconds to wait for the whole group before giving up.
+        priority: INTERACTIVE or BACKGROUND, used when waiting for quota.
+
+    Returns:
+        list: Decoded JSON bodies, in the same order as ``requests_list``.
+
+    Raises:
+        requests.exceptions.RequestException: If any call fails or the
+            group does not finish before the deadline.
+    """
+    import requests
+    from concurrent.futures import wait
+
+    give_up_at = time.monotonic() + deadline
+    executor = _get_executor()
+    futures = [
+        executor.submit(get_json, url, params, priority=priority, deadline=give_up_at)
+        for url, params in requests_list
+    ]
+    done, not_done = wait(futures, timeout=deadline)
+    if not_done:
+        for future in not_done:
+            future.cancel()
+        raise requests.exceptions.Timeout(f"Upstream calls did not finish within {deadline}s")
+    return [future.result() for future in futures]
@@ -1,142 +1,232 @@
+# ======================================
+# CONSOLE: Weather Checker CLI (main.py)
+# ======================================
+#
+# Console mode; the Streamlit UI is app.py. Only the lookup core is
+# imported, so the prompt appears without loading Streamlit:
+#
+#   python app/main.py
+#
+# Many cities, one per line, from a file or stdin ("-"), printed as one
+# JSON record per city (NDJSON) as soon as each lookup finishes:
+#
+#   python app/main.py --batch cities.txt
+#   cat cities.txt | python app/main.py --batch - --forecast 8 > weather.ndjson
+
 import json
-import requests
-import streamlit as st
+import os
+import sys
 from datetime import datetime
+from itertools import islice
+
+from config import ConfigError, load_api_key
+from units import METRIC, UNIT_SYSTEMS, convert_report, convert_summary
+from weather import (
+    BAD_API_KEY, BATCH_WORKERS, FORECAST_SLOTS, NOT_FOUND, extract_weather_info, failure_reason,
+    fetch_weather, fetch_weather_many, lookup_weather,
+)
+
 
 # =============================
-# CONFIGURATION: Load API Key
+# DISPLAY: Print Results
 # =============================
-def load_api_key():
+def display_weather(info, page_size: int = 10, pager=None, load_more=None, units=METRIC):
     """
-    Load the OpenWeatherMap API key from Streamlit secrets.
-
-    Returns:
-        str: The API key used for authenticating API requests.
+    Display current and 5-day forecast (every 3 hours), in ``units``.
+
+    Forecast entries are printed ``page_size`` at a time. When ``pager`` is
+    given, it is called after each page while more entries remain, and
+    printing continues only if it returns True. ``info`` may hold a trimmed
+    forecast; ``load_more()`` is then called once, when the user pages past
+    it, and should return the report with the full forecast (or None).
+    The daily summary then leaves out the day the trimmed forecast stops in.
     """
+    from analytics import SECONDS_PER_DAY, summarize_days
+
+    temp, speed, precipitation = units.temperature, units.speed, units.precipitation
+    # Daily summaries are computed from the metric values, then converted
+    summary = convert_summary(summarize_days(info.forecast), units)
+    info = convert_report(info, units)
+    days = summary.rows()
+    # A trimmed forecast usually ends partway through its last day, whose
+    # low/high and precipitation would then cover only some of its slots
+    if load_more is not None and days and info.forecast.timestamps[-1] % SECONDS_PER_DAY < SECONDS_PER_DAY - 3 * 3600:
+        days.pop()
+
+    print(f"\nWeather in {info.city}, {info.country}")
+    print(f"Now: {info.description}, {info.temperature:.1f}{temp.symbol}")
+    print(f"Humidity: {info.humidity}% | Wind: {info.wind_speed:.1f} {speed.symbol}")
+
+    print("\nDaily Summary:")
+    for day in days:
+        print(
+            f"{day['date']:%a %d.%m} | {day['temp_min']:.1f}–{day['temp_max']:.1f}{temp.symbol}"
+            f" | feels like {day['feels_like_min']:.1f}–{day['feels_like_max']:.1f}{temp.symbol}"
+            f" | {day['precipitation']:.{precipitation.digits}f} {precipitation.symbol}"
+        )
+    print("\n5-Day Forecast (3-hour intervals):")
 
-    return st.secrets["api_key"]
+    forecast = info.forecast
+    start = 0
+    while start < len(forecast) or (start and load_more is not None):
+        if start and (pager is None or not pager()):
+            break
+        if start >= len(forecast):
+            fuller, load_more = load_more(), None
+            if fuller is None or len(fuller.forecast) <= start:
+                break
+            forecast = convert_report(fuller, units).forecast
+        for slot in islice(forecast, start, start + page_size):
+            dt = datetime.fromtimestamp(slot.dt).strftime("%a %H:%M")
+            print(f"{dt} | {slot.description} | {slot.temp:.1f}{temp.symbol}")
+        start += page_size
 
-# ====================
-#  Fetch Weather Data
-# ====================
-def fetch_weather(city: str, api_key: str) -> dict | None:
-    """
-    Fetch current weather and 5-day forecast (3-hour intervals) for a specific city.
-    """
-    # Current weather
-    current_url = (
-        f"http://api.openweathermap.org/data/2.5/weather"
-        f"?q={city}"
-        f"&units=metric"
-        f"&appid={api_key}"
-    )
-
-    # Request Validation
-    try:
-        current_resp = requests.get(current_url)
-        current_resp.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        #st.error(f"Failed to fetch current weather: {e}")
-        return None
-
-    current_data = current_resp.json()
-
-    # 5-day forecast
-    forecast_url = (
-        f"http://api.openweathermap.org/data/2.5/forecast"
-        f"?q={city}"
-        f"&units=metric"
-        f"&appid={api_key}"
-    )
-
-    # Request Validation
-    try:
-        forecast_resp = requests.get(forecast_url)
-        forecast_resp.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Failed to fetch forecast weather: {e}")
-        return None
 
-    forecast_data = forecast_resp.json()
+# Forecast slots printed per console page
+CONSOLE_PAGE_SIZE = 10
+
+# Unit system of the console output: metric, metric_kmh or imperial
+CONSOLE_UNITS = UNIT_SYSTEMS.get(os.environ.get("WEATHER_UNITS", METRIC.name), METRIC)
 
-    return {
-        "city":        current_data["name"],
-        "country":     current_data["sys"]["country"],
-        "temperature": current_data["main"]["temp"],
-        "description": current_data["weather"][0]["description"],
-        "humidity":    current_data["main"]["humidity"],
-        "wind_speed":  current_data["wind"]["speed"],
-        "wind_deg":    current_data["wind"]["deg"],
-        "forecast":    forecast_data["list"],  # 3-hour segments
-    }
 
+def ask_for_more() -> bool:
+    """
+    Console pager: ask whether to print the next page of the forecast.
+    """
+    return input("\nPress Enter for more, or q to quit: ").strip().lower() != "q"
 
 
 # =============================
-# Extract & Format Weather Data
+# BATCH: Stream NDJSON Records
 # =============================
-def extract_weather_info(data):
+def ndjson_record(query: str, report, error, units=METRIC, slots: int = 0) -> dict:
     """
-    Prepare weather information for display based on current + forecast data.
+    Build the JSON record printed for one city of a batch, in ``units``.
+
+    Args:
+        query: The city name as it was read.
+        report: The WeatherReport, or None when the lookup failed.
+        error: The exception of a failed lookup.
+        units: Unit system of the values.
+        slots: Number of forecast slots included.
     """
+    if report is None:
+        # Not str(error): an HTTP error's message holds the URL, API key included
+        record = {"query": query, "ok": False, "reason": failure_reason(error), "error": type(error).__name__}
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        if status:
+            record["status"] = status
+        return record
+    report = convert_report(report, units)
     return {
-        "city":        data.get("city", ""),
-        "country":     data.get("country", ""),
-        "temperature": data["temperature"],
-        "description": data["description"],
-        "humidity":    data["humidity"],
-        "wind_speed":  data["wind_speed"],
-        "wind_deg":    data["wind_deg"],
-        "forecast":    data.get("forecast", []),
+        "query":       query,
+        "ok":          True,
+        "city":        report.city,
+        "country":     report.country,
+        "city_id":     report.city_id,
+        "observed_at": report.observed_at,
+        "temperature": report.temperature,
+        "description": report.description,
+        "humidity":    report.humidity,
+        "wind_speed":  report.wind_speed,
+        "wind_deg":    report.wind_deg,
+        "units":       {"temperature": units.temperature.symbol, "speed": units.speed.symbol,
+                        "precipitation": units.precipitation.symbol},
+        "forecast":    [{**slot._asdict(), "description": slot.description}
+                        for slot in islice(report.forecast, slots)],
     }
 
 
-# =============================
-# DISPLAY: Print Results
-# =============================
-def display_weather(info):
+def stream_ndjson(lines, api_key: str, out=None, units=METRIC, slots: int = 0,
+                  max_workers: int = BATCH_WORKERS) -> int:
     """
-    Display current and 5-day forecast (every 3 hours).
+    Look up every city in ``lines`` and write one NDJSON record per city to
+    ``out`` (stdout by default) as soon as its lookup finishes.
+
+    Lines are read lazily and only ``max_workers`` cities are in flight, so
+    the first record does not wait for the rest of the input, and memory
+    stays flat however many lines are piped in. Records come in completion
+    order; ``query`` ties each one to its input line.
+
+    Returns:
+        int: Number of cities whose lookup failed.
     """
-    print(f"\nWeather in {info['city']}, {info['country']}")
-    print(f"Now: {info['description']}, {info['temperature']}°C")
-    print(f"Humidity: {info['humidity']}% | Wind: {info['wind_speed']} km/h")
-    print("\n5-Day Forecast (3-hour intervals):")
-    for entry in info["forecast"][:10]:
-        dt = datetime.fromtimestamp(entry["dt"]).strftime("%a %H:%M")
-        temp = entry["main"]["temp"]
-        desc = entry["weather"][0]["description"]
-        print(f"{dt} | {desc} | {temp}°C")
+    out = out or sys.stdout
+    cities = (line.strip() for line in lines)
+    failed = 0
+    for query, report, error in fetch_weather_many((city for city in cities if city), api_key,
+                                                   max_workers=max_workers, horizon=max(slots, 1)):
+        failed += report is None
+        out.write(json.dumps(ndjson_record(query, report, error, units, slots), ensure_ascii=False) + "\n")
+        out.flush()
+    return failed
+
 
 # =================
 # MAIN FUNCTION
 # =================
-def main():
+def main(argv=None):
     """
       Main function to run the weather checker in console mode.
 
       - Prompts the user to enter a city name.
-      - Loads the API key
-      - Fetches weather data for the specified city.
+      - Loads the API key from OWM_API_KEY or .streamlit/secrets.toml
+      - Fetches weather data for the specified city, with only the first
+        page of the forecast; the rest is fetched if the user pages on.
       - If data is found, extracts relevant weather info and displays it.
-      - Otherwise, informs the user the city was not found.
+      - Otherwise, informs the user the lookup failed and asks again.
+
+      With ``--batch FILE`` (or ``-`` for stdin), streams one NDJSON record
+      per city instead; see ``stream_ndjson``.
       """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check the weather for a city, or for many as NDJSON")
+    parser.add_argument("--batch", metavar="FILE", help="read cities from FILE, one per line ('-' for stdin), "
+                                                        "and print one JSON record per city")
+    parser.add_argument("--forecast", type=int, default=0, metavar="SLOTS",
+                        help="forecast slots (3 hours each) included in each record")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="cities looked up concurrently")
+    parser.add_argument("--units", choices=UNIT_SYSTEMS, default=CONSOLE_UNITS.name, help="unit system")
+    args = parser.parse_args(argv)
+    units = UNIT_SYSTEMS[args.units]
+
+    try:
+        api_key = load_api_key()
+    except ConfigError as e:
+        raise SystemExit(f"No API key: {e}")
+
+    if args.batch:
+        source = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+        try:
+            with source:
+                stream_ndjson(source, api_key, units=units, slots=min(max(args.forecast, 0), FORECAST_SLOTS),
+                              max_workers=max(args.workers, 1))
+        except BrokenPipeError:
+            # The reader went away (e.g. piped into head); stop quietly
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+
     print("Hello from Weather Checker!")
-    api_key = load_api_key()
 
     while True:
         user_city = input("\nPlease enter your city name:\n")
-        data = fetch_weather(user_city, api_key)
-        if data is None:
-            st.error("Failed to fetch weather data! Please check the city name or try again later.")
-            st.stop()
-
+        data, error = lookup_weather(user_city, api_key, horizon=CONSOLE_PAGE_SIZE)
         if data:
             weather_info = extract_weather_info(data)
-            display_weather(weather_info)
+            load_more = None
+            if len(weather_info.forecast) < FORECAST_SLOTS:
+                load_more = lambda: fetch_weather(user_city, api_key)
+            display_weather(weather_info, page_size=CONSOLE_PAGE_SIZE, pager=ask_for_more,
+                            load_more=load_more, units=units)
             break
+        elif failure_reason(error) == NOT_FOUND:
+            print("City not found! Please check the city name.")
+        elif failure_reason(error) == BAD_API_KEY:
+            # Every further lookup would be refused too
+            raise SystemExit("The weather service rejected the API key; check OWM_API_KEY or .streamlit/secrets.toml")
         else:
-            print("City not found! Please try again.")
+            print("Failed to fetch weather data! The service is busy or unreachable; try again later.")
 
 
 # =============
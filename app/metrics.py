@@ -0,0 +1,256 @@
+# ==========================================
+# METRICS: Timings and counters (metrics.py)
+# ==========================================
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds, from cache hits to slow upstreams
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# =============================
+#  Metric Registry
+# =============================
+class Registry:
+    """
+    Thread-safe store of counters and latency histograms, keyed by metric
+    name and label values.
+
+    Recording is a dict lookup and a few additions under one lock, cheap
+    enough to leave on in production. Gauges are read on export from
+    collectors, e.g. the cache's own ``stats()``.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}     # (name, labels) -> value
+        self._histograms = {}   # (name, labels) -> [bucket counts..., count, sum]
+        self._help = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, text: str):
+        """
+        Set the HELP text exported for a metric.
+        """
+        self._help[name] = text
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """
+        Add ``amount`` to a counter.
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, **labels):
+        """
+        Record one duration in a histogram.
+        """
+        key = (name, _label_key(labels))
+        slot = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts = self._histograms.get(key)
+            if counts is None:
+                counts = self._histograms[key] = [0] * (len(self.buckets) + 3)
+            counts[slot] += 1
+            counts[-2] += 1
+            counts[-1] += seconds
+
+    @contextmanager
+    def span(self, phase: str, **labels):
+        """
+        Time a block into the ``weather_phase_seconds`` histogram.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("weather_phase_seconds", time.perf_counter() - start, phase=phase, **labels)
+
+    def register_collector(self, collector):
+        """
+        Add a callable returning {gauge name: value}, read on every export.
+        """
+        self._collectors.append(collector)
+
+    def reset(self):
+        """
+        Drop all recorded counters and histograms.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def _copy(self) -> tuple[dict, dict]:
+        with self._lock:
+            return dict(self._counters), {k: list(v) for k, v in self._histograms.items()}
+
+    def _gauges(self) -> dict:
+        gauges = {}
+        for collector in self._collectors:
+            try:
+                gauges.update(collector())
+            except Exception:
+                pass
+        return gauges
+
+    def snapshot(self) -> dict:
+        """
+        Return counters, gauges and per-histogram count, mean and
+        approximate p50/p95 (bucket upper bounds), e.g. for a debug panel.
+        """
+        counters, histograms = self._copy()
+        summaries = {}
+        for (name, labels), counts in histograms.items():
+            count, total = counts[-2], counts[-1]
+            summaries[_series(name, labels)] = {
+                "count": count,
+                "mean":  total / count if count else 0.0,
+                "p50":   self._quantile(counts, 0.50),
+                "p95":   self._quantile(counts, 0.95),
+            }
+        return {
+            "counters":   {_series(name, labels): value for (name, labels), value in counters.items()},
+            "gauges":     self._gauges(),
+            "histograms": summaries,
+        }
+
+    def _quantile(self, counts: list, q: float) -> float:
+        target = q * counts[-2]
+        seen = 0
+        for bound, n in zip(self.buckets, counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def render_prometheus(self) -> str:
+        """
+        Return all metrics in the Prometheus text exposition format.
+        """
+        counters, histograms = self._copy()
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{_series(name, labels)} {value:g}")
+
+        for (name, labels), counts in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{_series(name + '_bucket', labels + (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{_series(name + '_bucket', labels + (('le', '+Inf'),))} {counts[-2]}")
+            lines.append(f"{_series(name + '_count', labels)} {counts[-2]}")
+            lines.append(f"{_series(name + '_sum', labels)} {counts[-1]:.6f}")
+
+        for name, value in sorted(self._gauges().items()):
+            header(name, "gauge")
+            lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _label_key(labels: dict) -> tuple:
+    # Label values are text in the exposition format; keeping them str also
+    # keeps series keys sortable when one label mixes e.g. 200 and "Timeout"
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _series(name: str, labels: tuple) -> str:
+    if not labels:
+        return name
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return f"{name}{{{body}}}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# =============================
+#  Exporters
+# =============================
+def write_prometheus(registry: Registry, path: str | os.PathLike):
+    """
+    Write the metrics to a file atomically, e.g. for node_exporter's
+    textfile collector.
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(registry.render_prometheus())
+    os.replace(tmp, path)
+
+
+def start_file_exporter(registry: Registry, path: str | os.PathLike, interval: float = 15) -> threading.Thread:
+    """
+    Rewrite the metrics file every ``interval`` seconds from a daemon thread.
+    """
+    def _run():
+        while True:
+            try:
+                write_prometheus(registry, path)
+            except Exception:
+                # Never let one failed export end the thread
+                pass
+            time.sleep(interval)
+
+    thread = threading.Thread(target=_run, name="metrics-file", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_http_server(registry: Registry, port: int, host: str = "127.0.0.1"):
+    """
+    Serve the metrics at ``http://host:port/metrics`` from a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+
+    Raises:
+        OSError: If the port cannot be bound.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+# Process-wide registry used by the app
+registry = Registry()
+registry.describe("weather_phase_seconds", "Time spent per phase of a weather lookup")
+registry.describe("weather_lookup_seconds", "End-to-end fetch_weather latency")
+registry.describe("weather_cache_total", "Cache lookups by outcome")
+registry.describe("weather_upstream_responses_total", "Upstream responses by endpoint and status")
+registry.describe("weather_alerts_total", "Watchlist alerts raised and cleared, by rule")
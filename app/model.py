@@ -0,0 +1,200 @@
+# ===============================================
+# WEATHER MODEL: Compact result types (model.py)
+# ===============================================
+
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import NamedTuple
+
+# OpenWeatherMap condition id -> description, shared by every forecast so
+# each slot stores a 2-byte code instead of its own description string
+_condition_descriptions: dict[int, str] = {}
+
+
+def describe_condition(code: int) -> str:
+    """
+    Return the description OpenWeatherMap gave for a condition id.
+    """
+    return _condition_descriptions.get(code, "")
+
+
+def _remember_condition(weather: dict) -> int:
+    code = weather["id"]
+    if code not in _condition_descriptions:
+        _condition_descriptions[code] = sys.intern(weather["description"])
+    return code
+
+
+# =============================
+# Forecast (3-hour slots)
+# =============================
+class ForecastSlot(NamedTuple):
+    """
+    One 3-hour forecast slot, built on demand from the forecast columns.
+    """
+    dt: int             # Unix timestamp (UTC)
+    temp: float
+    humidity: int
+    wind_speed: float
+    wind_deg: int
+    precipitation: float  # rain + snow in the 3 hours, mm
+    code: int           # OpenWeatherMap condition id
+
+    @property
+    def description(self) -> str:
+        return describe_condition(self.code)
+
+
+class Forecast:
+    """
+    Columnar 5-day forecast: one typed array per field instead of one
+    nested dict per slot.
+    """
+    __slots__ = ("timestamps", "temperatures", "humidity", "wind_speed", "wind_deg",
+                 "precipitation", "codes")
+
+    def __init__(self, timestamps=None, temperatures=None, humidity=None,
+                 wind_speed=None, wind_deg=None, precipitation=None, codes=None):
+        self.timestamps = timestamps if timestamps is not None else array("q")
+        self.temperatures = temperatures if temperatures is not None else array("d")
+        self.humidity = humidity if humidity is not None else array("B")
+        self.wind_speed = wind_speed if wind_speed is not None else array("d")
+        self.wind_deg = wind_deg if wind_deg is not None else array("H")
+        self.precipitation = precipitation if precipitation is not None else array("d")
+        self.codes = codes if codes is not None else array("H")
+
+    @classmethod
+    def from_owm(cls, entries) -> "Forecast":
+        """
+        Build a forecast from the ``list`` of an OpenWeatherMap /forecast
+        response in a single pass, keeping only the fields the app uses.
+        """
+        forecast = cls()
+        timestamps, temperatures = forecast.timestamps, forecast.temperatures
+        humidity, wind_speed, wind_deg = forecast.humidity, forecast.wind_speed, forecast.wind_deg
+        precipitation, codes = forecast.precipitation, forecast.codes
+        for entry in entries:
+            main = entry["main"]
+            wind = entry.get("wind", {})
+            rain = entry.get("rain")
+            snow = entry.get("snow")
+            timestamps.append(entry["dt"])
+            temperatures.append(main["temp"])
+            humidity.append(main["humidity"])
+            wind_speed.append(wind.get("speed", 0.0))
+            wind_deg.append(wind.get("deg", 0))
+            precipitation.append((rain.get("3h", 0.0) if rain else 0.0) + (snow.get("3h", 0.0) if snow else 0.0))
+            codes.append(_remember_condition(entry["weather"][0]))
+        return forecast
+
+    def to_dict(self) -> dict:
+        """
+        Plain-JSON form of the forecast, one list per column.
+        """
+        return {
+            "timestamps":    self.timestamps.tolist(),
+            "temperatures":  self.temperatures.tolist(),
+            "humidity":      self.humidity.tolist(),
+            "wind_speed":    self.wind_speed.tolist(),
+            "wind_deg":      self.wind_deg.tolist(),
+            "precipitation": self.precipitation.tolist(),
+            "codes":         self.codes.tolist(),
+            "conditions":    {code: describe_condition(code) for code in set(self.codes)},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Forecast":
+        """
+        Rebuild a forecast saved with ``to_dict``.
+        """
+        for code, description in data.get("conditions", {}).items():
+            _remember_condition({"id": int(code), "description": description})
+        return cls(
+            timestamps=array("q", data["timestamps"]),
+            temperatures=array("d", data["temperatures"]),
+            humidity=array("B", data["humidity"]),
+            wind_speed=array("d", data["wind_speed"]),
+            wind_deg=array("H", data["wind_deg"]),
+            precipitation=array("d", data["precipitation"]),
+            codes=array("H", data["codes"]),
+        )
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, i) -> ForecastSlot:
+        return ForecastSlot(
+            self.timestamps[i], self.temperatures[i], self.humidity[i],
+            self.wind_speed[i], self.wind_deg[i], self.precipitation[i], self.codes[i],
+        )
+
+    def __iter__(self):
+        return map(ForecastSlot, self.timestamps, self.temperatures, self.humidity,
+                   self.wind_speed, self.wind_deg, self.precipitation, self.codes)
+
+
+# =============================
+# Weather Report
+# =============================
+@dataclass(frozen=True, slots=True)
+class WeatherReport:
+    """
+    Current conditions for a city plus its 5-day forecast.
+    """
+    city: str
+    country: str
+    temperature: float
+    description: str
+    humidity: int
+    wind_speed: float
+    wind_deg: int
+    forecast: Forecast
+    city_id: int = 0        # OpenWeatherMap city id
+    observed_at: int = 0    # Unix timestamp of the current conditions
+    code: int = 0           # OpenWeatherMap condition id of the current conditions
+
+    @classmethod
+    def from_owm(cls, current_data: dict, forecast_data: dict) -> "WeatherReport":
+        """
+        Build a report from the /weather and /forecast JSON responses.
+        """
+        weather = current_data["weather"][0]
+        return cls(
+            city=current_data["name"],
+            country=current_data["sys"]["country"],
+            temperature=current_data["main"]["temp"],
+            description=sys.intern(weather["description"]),
+            humidity=current_data["main"]["humidity"],
+            wind_speed=current_data["wind"]["speed"],
+            wind_deg=current_data["wind"].get("deg", 0),
+            forecast=Forecast.from_owm(forecast_data["list"]),  # 3-hour segments
+            city_id=current_data.get("id", 0),
+            observed_at=current_data.get("dt", 0),
+            code=_remember_condition(weather),
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Plain-JSON form of the report, e.g. for the persistent store.
+        """
+        return {
+            "city":        self.city,
+            "country":     self.country,
+            "temperature": self.temperature,
+            "description": self.description,
+            "humidity":    self.humidity,
+            "wind_speed":  self.wind_speed,
+            "wind_deg":    self.wind_deg,
+            "forecast":    self.forecast.to_dict(),
+            "city_id":     self.city_id,
+            "observed_at": self.observed_at,
+            "code":        self.code,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "WeatherReport":
+        """
+        Rebuild a report saved with ``to_dict``.
+        """
+        return cls(**{**data, "forecast": Forecast.from_dict(data["forecast"])})
@@ -0,0 +1,157 @@
+# ==================================================
+# PREFETCH: Keep popular cities warm (prefetch.py)
+# ==================================================
+
+import heapq
+import math
+import threading
+import time
+
+
+# =============================
+#  Popularity Tracking
+# =============================
+class PopularityTracker:
+    """
+    Exponentially decayed lookup counts per cache key.
+
+    A lookup adds 1 to the key's score, and scores halve every
+    ``half_life`` seconds, so the ranking follows recent traffic.
+    """
+
+    def __init__(self, half_life: float = 3600, max_keys: int = 10000):
+        self.decay = math.log(2) / half_life
+        self.max_keys = max_keys
+        self._scores = {}  # key -> [score, updated_at, city, api_key]
+        self._lock = threading.Lock()
+
+    def record(self, key, city, api_key: str):
+        """
+        Count one lookup of ``key``, remembering how to fetch it again.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._scores.get(key)
+            if entry is None:
+                if len(self._scores) >= self.max_keys:
+                    self._forget_least_popular(now)
+                self._scores[key] = [1.0, now, city, api_key]
+                return
+            entry[0] = entry[0] * math.exp(-self.decay * (now - entry[1])) + 1.0
+            entry[1] = now
+            entry[2], entry[3] = city, api_key
+
+    def forget(self, key):
+        """
+        Stop tracking ``key``, e.g. after refreshing it failed.
+        """
+        with self._lock:
+            self._scores.pop(key, None)
+
+    def _forget_least_popular(self, now: float):
+        victim = min(self._scores, key=lambda k: self._score(self._scores[k], now))
+        del self._scores[victim]
+
+    def _score(self, entry, now: float) -> float:
+        return entry[0] * math.exp(-self.decay * (now - entry[1]))
+
+    def top(self, k: int, min_score: float = 0.0) -> list[tuple]:
+        """
+        Return the ``k`` most popular entries as (key, city, api_key, score),
+        leaving out those whose score has decayed below ``min_score``.
+        """
+        now = time.monotonic()
+        with self._lock:
+            ranked = heapq.nlargest(
+                k, self._scores.items(), key=lambda item: self._score(item[1], now)
+            )
+            ranked = [(key, entry[2], entry[3], self._score(entry, now)) for key, entry in ranked]
+        return [item for item in ranked if item[3] >= min_score]
+
+
+# =============================
+#  Background Prefetcher
+# =============================
+class Prefetcher:
+    """
+    Daemon thread that refreshes the most popular cities shortly before
+    their cache entries stop being fresh.
+
+    It only spends quota the scheduler reports as spare, and stops a round
+    as soon as interactive calls are queued, so users never wait behind it.
+    Cities whose popularity has decayed below ``min_score`` are left to
+    expire, and a city whose refresh fails is dropped until it is looked
+    up successfully again.
+    """
+
+    def __init__(self, tracker: PopularityTracker, cache, scheduler, refresh,
+                 top_k: int = 50, interval: float = 15, lead_time: float = 60,
+                 reserve_tokens: float = 4, min_score: float = 0.5):
+        self.tracker = tracker
+        self.cache = cache
+        self.scheduler = scheduler
+        self.refresh = refresh          # refresh(key, city, api_key)
+        self.top_k = top_k
+        self.interval = interval
+        self.lead_time = lead_time
+        self.reserve_tokens = reserve_tokens
+        self.min_score = min_score
+        self.refreshed = 0
+        self.skipped_busy = 0
+        self.failures = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """
+        Start the background thread if it is not running yet.
+        """
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="weather-prefetch", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def run_once(self) -> int:
+        """
+        Refresh popular entries that are missing or about to expire.
+
+        Returns:
+            int: Number of entries refreshed in this round.
+        """
+        refreshed = 0
+        for key, city, api_key, _ in self.tracker.top(self.top_k, self.min_score):
+            remaining = self.cache.expires_in(key)
+            if remaining is not None and remaining > self.lead_time:
+                continue
+            if not self.scheduler.has_spare_capacity(self.reserve_tokens):
+                self.skipped_busy += 1
+                break
+            try:
+                self.refresh(key, city, api_key)
+                refreshed += 1
+            except Exception:
+                self.failures += 1
+                self.tracker.forget(key)
+        self.refreshed += refreshed
+        return refreshed
+
+    def stats(self) -> dict:
+        """
+        Return how many entries were refreshed, skipped or failed.
+        """
+        return {
+            "refreshed":    self.refreshed,
+            "skipped_busy": self.skipped_busy,
+            "failures":     self.failures,
+            "tracked":      len(self.tracker._scores),
+        }
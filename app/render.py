@@ -0,0 +1,282 @@
+# ==============================================
+# FORECAST RENDERING: HTML builders (render.py)
+# ==============================================
+
+from datetime import datetime, timezone
+from html import escape
+
+from units import METRIC
+
+# ================================
+# Weather Description Translations
+# ================================
+
+description_translations = {
+    "clear sky": "שמיים בהירים",
+    "few clouds": "מעונן קלות",
+    "scattered clouds": "מעונן חלקית",
+    "broken clouds": "מעונן",
+    "shower rain": "גשם מקומי",
+    "rain": "גשם",
+    "thunderstorm": "סופת רעמים",
+    "snow": "שלג",
+    "mist": "ערפל",
+}
+# Weather Emojis by Description
+weather_emojis = {
+    "clear sky": "☀️",
+    "few clouds": "🌤️",
+    "scattered clouds": "⛅",
+    "broken clouds": "☁️",
+    "shower rain": "🌦️",
+    "rain": "🌧️",
+    "thunderstorm": "🌩️",
+    "snow": "❄️",
+    "mist": "🌫️",
+}
+
+# Hebrew date format, compatible with Windows
+weekday_names = {
+    "Sunday": "יום ראשון",
+    "Monday": "יום שני",
+    "Tuesday": "יום שלישי",
+    "Wednesday": "יום רביעי",
+    "Thursday": "יום חמישי",
+    "Friday": "יום שישי",
+    "Saturday": "יום שבת"
+}
+
+month_names = {
+    "January": "ינואר",
+    "February": "פברואר",
+    "March": "מרץ",
+    "April": "אפריל",
+    "May": "מאי",
+    "June": "יוני",
+    "July": "יולי",
+    "August": "אוגוסט",
+    "September": "ספטמבר",
+    "October": "אוקטובר",
+    "November": "נובמבר",
+    "December": "דצמבר"
+}
+
+
+# =============================
+# Forecast Preparation
+# =============================
+def prepare_forecast(forecast):
+    """
+    Turn a Forecast into rows for rendering, once per lookup.
+
+    Returns:
+        list: One dict per 3-hour slot with the parsed datetime (UTC), the
+            hour label, temperature, description and emoji.
+    """
+    rows = []
+    for slot in forecast:
+        dt = datetime.fromtimestamp(slot.dt, timezone.utc)
+        description = slot.description
+        rows.append({
+            "dt":          dt,
+            "hour":        dt.strftime("%H:%M"),
+            "temp":        slot.temp,
+            "description": description,
+            "emoji":       weather_emojis.get(description, "🌤️"),
+        })
+    return rows
+
+
+def format_date_heading(dt, language):
+    """
+    Build the "📆 weekday, date" heading for a forecast day.
+    """
+    if language == "עברית":
+        hebrew_date = f"{weekday_names[dt.strftime('%A')]}, {dt.day} ב{month_names[dt.strftime('%B')]}"
+        return f"📆 {hebrew_date}"
+    return f"📆 {dt.strftime('%A')}, {dt.strftime('%B')} {dt.day}"
+
+
+# =============================
+# Forecast HTML
+# =============================
+def group_forecast_by_day(forecast_rows):
+    """
+    Group prepared forecast rows into consecutive days.
+
+    Returns:
+        list: (date, rows) pairs in chronological order.
+    """
+    days = []
+    for row in forecast_rows:
+        date_only = row["dt"].date()
+        if not days or days[-1][0] != date_only:
+            days.append((date_only, []))
+        days[-1][1].append(row)
+    return days
+
+
+def build_day_html(day_rows, language, units=METRIC):
+    """
+    Render the forecast rows of one day as a single HTML table, with rows
+    prepared from a forecast already in ``units``.
+    """
+    align = "right" if language == "עברית" else "left"
+
+    parts = ["<table style='width:100%; border-collapse:separate; border-spacing:0 8px; border:none;'>"]
+    for idx, row in enumerate(day_rows):
+        description = row["description"]
+        if language == "עברית":
+            description = description_translations.get(description, description)
+
+        # Alternate row background color
+        bg_color = "#f9f9f9" if idx % 2 == 0 else "#eeeeee"
+
+        parts.append(
+            f"<tr style='background-color:{bg_color};'>"
+            f"<td style='width:12%; font-size:36px; text-align:center; border:none; padding:10px;'>{row['emoji']}</td>"
+            f"<td style='width:25%; font-size:28px; font-weight:bold; text-align:center; border:none;'>{row['hour']}</td>"
+            f"<td style='font-size:18px; text-align:{align}; border:none;'>"
+            f"{escape(description)}, <strong>{row['temp']:.1f}{units.temperature.symbol}</strong></td>"
+            "</tr>"
+        )
+    parts.append("</table>")
+    return "".join(parts)
+
+
+# =============================
+# Daily Summary HTML
+# =============================
+summary_labels = {
+    "English": {
+        "title": "📊 Daily Summary",
+        "day": "Day",
+        "low_high": "Low / High",
+        "feels_like": "Feels like",
+        "humidity": "Humidity",
+        "wind": "Max wind",
+        "precipitation": "Precipitation",
+    },
+    "עברית": {
+        "title": "📊 סיכום יומי",
+        "day": "יום",
+        "low_high": "מינימום / מקסימום",
+        "feels_like": "מורגש כמו",
+        "humidity": "לחות",
+        "wind": "רוח מרבית",
+        "precipitation": "משקעים",
+    },
+}
+
+
+def build_daily_summary_html(days, language, units=METRIC):
+    """
+    Render per-day summaries (analytics.DailySummary.rows) as one HTML
+    table, with values already in ``units``.
+    """
+    labels = summary_labels[language]
+    temp, speed, precipitation = units.temperature, units.speed, units.precipitation
+    if language == "עברית":
+        direction, align = "rtl", "right"
+    else:
+        direction, align = "ltr", "left"
+
+    cell = f"style='padding:6px 10px; text-align:{align}; border:none;'"
+    parts = [
+        f"<div style='direction:{direction};'>"
+        f"<h4 style='color:#4a148c; text-align:{align};'>{labels['title']}</h4>"
+        "<table style='width:100%; border-collapse:collapse; border:none;'>"
+        "<tr style='background-color:#f3e5f5;'>"
+        f"<th {cell}>{labels['day']}</th><th {cell}>{labels['low_high']}</th>"
+        f"<th {cell}>{labels['feels_like']}</th><th {cell}>{labels['humidity']}</th>"
+        f"<th {cell}>{labels['wind']}</th><th {cell}>{labels['precipitation']}</th>"
+        "</tr>"
+    ]
+    for idx, day in enumerate(days):
+        # Alternate row background color
+        bg_color = "#f9f9f9" if idx % 2 == 0 else "#eeeeee"
+        parts.append(
+            f"<tr style='background-color:{bg_color};'>"
+            f"<td {cell}>{format_date_heading(day['date'], language)}</td>"
+            f"<td {cell}><strong>{day['temp_min']:.1f}° / {day['temp_max']:.1f}{temp.symbol}</strong></td>"
+            f"<td {cell}>{day['feels_like_min']:.1f}° / {day['feels_like_max']:.1f}{temp.symbol}</td>"
+            f"<td {cell}>{day['humidity_mean']:.0f}%</td>"
+            f"<td {cell}>{day['wind_max']:.1f} {speed.symbol}</td>"
+            f"<td {cell}>{day['precipitation']:.{precipitation.digits}f} {precipitation.symbol}</td>"
+            "</tr>"
+        )
+    parts.append("</table></div>")
+    return "".join(parts)
+
+
+# =============================
+# City Comparison Cards
+# =============================
+card_labels = {
+    "English": {
+        "loading": "Loading…",
+        "not_found": "City not found",
+        "unavailable": "Service busy, try again",
+        "bad_api_key": "API key rejected",
+        "next_24h": "Next 24 h",
+    },
+    "עברית": {
+        "loading": "בטעינה…",
+        "not_found": "העיר לא נמצאה",
+        "unavailable": "השירות עמוס, נסו שוב",
+        "bad_api_key": "מפתח ה־API נדחה",
+        "next_24h": "ב־24 השעות הקרובות",
+    },
+}
+
+_card_style = ("background-color:#f3e5f5; padding:15px; border-radius:10px; text-align:center; "
+               "margin-bottom:16px; min-height:220px;")
+
+
+def build_city_card_html(report, language, units=METRIC, slots=8):
+    """
+    Render one city of the comparison view as a card: current conditions,
+    and the low/high of its first ``slots`` forecast slots, from a report
+    already in ``units``.
+    """
+    direction = "rtl" if language == "עברית" else "ltr"
+    temp = units.temperature.symbol
+    description = report.description
+    if language == "עברית":
+        description = description_translations.get(description, description)
+
+    parts = [
+        f"<div style='{_card_style} direction:{direction};'>"
+        f"<div style='font-size:22px; font-weight:bold; color:#4a148c;'>"
+        f"<span dir='ltr'>{escape(report.city)}, {escape(report.country)}</span></div>"
+        f"<div style='font-size:44px;'>{weather_emojis.get(report.description, '🌤️')}</div>"
+        f"<div style='font-size:30px; font-weight:bold;'>{report.temperature:.1f}{temp}</div>"
+        f"<div style='font-size:18px;'>{escape(description)}</div>"
+    ]
+    temperatures = report.forecast.temperatures[:slots]
+    if temperatures:
+        parts.append(
+            f"<div style='font-size:16px; margin-top:6px;'>{card_labels[language]['next_24h']}: "
+            f"<strong>{min(temperatures):.1f}° / {max(temperatures):.1f}{temp}</strong></div>"
+        )
+    parts.append(
+        f"<div style='font-size:16px;'>💧 {report.humidity}% · 🌬️ {report.wind_speed:.1f} {units.speed.symbol}</div>"
+        "</div>"
+    )
+    return "".join(parts)
+
+
+def build_status_card_html(query, language, status):
+    """
+    Render the card of a city that has no result (yet): ``status`` is
+    "loading", "not_found", "bad_api_key" or "unavailable".
+    """
+    direction = "rtl" if language == "עברית" else "ltr"
+    emoji = "⏳" if status == "loading" else "⚠️"
+    return (
+        f"<div style='{_card_style} direction:{direction}; color:#777;'>"
+        f"<div style='font-size:22px; font-weight:bold;'><span dir='ltr'>{escape(query)}</span></div>"
+        f"<div style='font-size:44px;'>{emoji}</div>"
+        f"<div style='font-size:18px;'>{card_labels[language][status]}</div>"
+        "</div>"
+    )
@@ -0,0 +1,136 @@
+import heapq
+import itertools
+import threading
+import time
+
+# =============================
+# Request Priorities
+# =============================
+INTERACTIVE = 0   # a user is waiting on the result
+BACKGROUND = 1    # batch jobs, refreshes and prefetching
+
+
+# ===================================
+#  Token-Bucket Scheduler for Quota
+# ===================================
+class RateScheduler:
+    """
+    Shared token bucket that paces upstream calls to stay within a
+    per-minute quota.
+
+    Callers wait in a priority queue: a background call only gets a
+    token when no interactive call is waiting. After a 429 response the
+    whole bucket is paused with ``backoff`` so that every caller slows
+    down, not just the one that was rejected.
+    """
+
+    def __init__(self, calls_per_minute: float = 60, burst: int | None = None):
+        self.rate = calls_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1, int(calls_per_minute // 6))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters = []  # heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._granted = [0, 0]
+        self._wait_total = [0.0, 0.0]
+        self._wait_max = [0.0, 0.0]
+        self._timeouts = 0
+        self._throttled = 0
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        if now >= self._paused_until:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def acquire(self, priority: int = INTERACTIVE, timeout: float | None = None) -> bool:
+        """
+        Wait for a token.
+
+        Args:
+            priority: INTERACTIVE or BACKGROUND.
+            timeout: Seconds to wait at most, or None to wait forever.
+
+        Returns:
+            bool: True once a token is taken, False if the timeout expired.
+        """
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        entry = (priority, next(self._sequence))
+
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] == entry and self._tokens >= 1 and now >= self._paused_until:
+                        self._tokens -= 1
+                        break
+
+                    if now < self._paused_until:
+                        delay = self._paused_until - now
+                    else:
+                        delay = max((1 - self._tokens) / self.rate, 0.001)
+                    if deadline is not None:
+                        if now >= deadline:
+                            self._timeouts += 1
+                            return False
+                        delay = min(delay, deadline - now)
+                    self._cond.wait(delay)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            self._granted[priority] += 1
+            self._wait_total[priority] += waited
+            self._wait_max[priority] = max(self._wait_max[priority], waited)
+        return True
+
+    def backoff(self, seconds: float):
+        """
+        Stop handing out tokens for ``seconds`` and empty the bucket.
+
+        Used when the upstream answers 429 Too Many Requests.
+        """
+        with self._cond:
+            self._throttled += 1
+            self._tokens = 0.0
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def has_spare_capacity(self, reserve: float = 1.0) -> bool:
+        """
+        Return True if nobody is queued and more than ``reserve`` tokens are
+        available, i.e. a background call would not delay interactive ones.
+        """
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            return not self._waiters and now >= self._paused_until and self._tokens > reserve
+
+    def stats(self) -> dict:
+        """
+        Return queue depth per priority, wait-time totals and throttling counters.
+        """
+        with self._cond:
+            queued = [0, 0]
+            for priority, _ in self._waiters:
+                queued[priority] += 1
+            return {
+                "queue_interactive":        queued[INTERACTIVE],
+                "queue_background":         queued[BACKGROUND],
+                "granted_interactive":      self._granted[INTERACTIVE],
+                "granted_background":       self._granted[BACKGROUND],
+                "wait_seconds_interactive": self._wait_total[INTERACTIVE],
+                "wait_seconds_background":  self._wait_total[BACKGROUND],
+                "max_wait_interactive":     self._wait_max[INTERACTIVE],
+                "max_wait_background":      self._wait_max[BACKGROUND],
+                "tokens":                   self._tokens,
+                "timeouts":                 self._timeouts,
+                "throttled":                self._throttled,
+            }
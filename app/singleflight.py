@@ -0,0 +1,84 @@
+import threading
+
+
+# =============================
+#  Request Coalescing
+# =============================
+class _Call:
+    """
+    One in-flight call and the outcome that its waiters will share.
+    """
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time.
+
+    Callers that ask for a key while a call for it is already running
+    wait for that call instead of starting their own, and all of them get
+    its result or its exception.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        """
+        Call ``fn()`` for ``key``, or join the call already in flight.
+
+        Returns:
+            The value returned by ``fn``.
+
+        Raises:
+            Whatever ``fn`` raised, re-raised in every waiting caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """
+        Return the number of keys with a call currently running.
+        """
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        """
+        Return how many calls ran and how many callers joined one instead.
+        """
+        with self._lock:
+            return {"leaders": self.leaders, "shared": self.shared, "in_flight": len(self._calls)}
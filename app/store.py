@@ -0,0 +1,110 @@
+# ==================================================
+# RESPONSE STORE: Durable weather results (store.py)
+# ==================================================
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from model import WeatherReport
+
+# =============================
+# Store Modes
+# =============================
+OFF = "off"         # no persistence
+RECORD = "record"   # write every upstream result, serve stored ones on cache misses
+REPLAY = "replay"   # serve recorded results only, never call upstream
+
+STORE_MODES = (OFF, RECORD, REPLAY)
+
+
+class NotRecordedError(LookupError):
+    """
+    Raised in replay mode when a lookup has no recorded result.
+    """
+
+
+# =============================
+#  SQLite Response Store
+# =============================
+class ResponseStore:
+    """
+    Persistent store of weather results in a SQLite database in WAL mode,
+    so several app processes on one host can read and write it at once.
+
+    Keys are the same tuples the in-memory cache uses. Results are stored
+    as compact JSON (``WeatherReport.to_dict``), with the time they were
+    fetched.
+    """
+
+    def __init__(self, path: str | Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS weather ("
+            " key TEXT PRIMARY KEY,"
+            " fetched_at REAL NOT NULL,"
+            " payload TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS weather_fetched_at ON weather (fetched_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _encode_key(key: tuple) -> str:
+        return json.dumps(list(key), separators=(",", ":"))
+
+    @staticmethod
+    def _decode_key(text: str) -> tuple:
+        return tuple(json.loads(text))
+
+    def put(self, key: tuple, report: WeatherReport, fetched_at: float | None = None):
+        """
+        Save (or replace) the result for a key.
+        """
+        payload = json.dumps(report.to_dict(), separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO weather (key, fetched_at, payload) VALUES (?, ?, ?)",
+                (self._encode_key(key), fetched_at if fetched_at is not None else time.time(), payload),
+            )
+            self._conn.commit()
+
+    def get(self, key: tuple) -> tuple[float, WeatherReport] | None:
+        """
+        Return (fetched_at, report) for a key, or None if nothing is stored.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, payload FROM weather WHERE key = ?", (self._encode_key(key),)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], WeatherReport.from_dict(json.loads(row[1]))
+
+    def recent(self, max_age: float, limit: int = -1):
+        """
+        Yield (key, fetched_at, report) for results younger than ``max_age``
+        seconds, newest first, at most ``limit`` of them (all if negative).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, fetched_at, payload FROM weather WHERE fetched_at >= ?"
+                " ORDER BY fetched_at DESC LIMIT ?",
+                (time.time() - max_age, limit),
+            ).fetchall()
+        for key, fetched_at, payload in rows:
+            yield self._decode_key(key), fetched_at, WeatherReport.from_dict(json.loads(payload))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM weather").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,125 @@
+# =========================================
+# UNITS: Display unit conversion (units.py)
+# =========================================
+#
+# Results are fetched, cached and stored once, in OpenWeatherMap's metric
+# units (°C, m/s, mm). Other unit systems are applied when displaying, so
+# switching units needs no API call and no cache entry of its own.
+
+import dataclasses
+from array import array
+from dataclasses import dataclass
+
+from model import Forecast, WeatherReport
+
+
+# =============================
+#  Units and Unit Systems
+# =============================
+@dataclass(frozen=True, slots=True)
+class Unit:
+    """
+    A display unit, as a linear conversion from the stored metric value.
+    """
+    symbol: str
+    scale: float = 1.0
+    offset: float = 0.0
+    digits: int = 1     # decimals shown
+
+    @property
+    def is_identity(self) -> bool:
+        return self.scale == 1.0 and self.offset == 0.0
+
+    def convert(self, values):
+        """
+        Convert a number, or a whole array of numbers at once (NumPy
+        arrays, or anything NumPy can read, e.g. array("d") columns).
+        """
+        if self.is_identity:
+            return values
+        if isinstance(values, (int, float)):
+            return values * self.scale + self.offset
+        # NumPy is only needed once a non-metric system is picked
+        import numpy as np
+        return np.asarray(values, dtype=np.float64) * self.scale + self.offset
+
+
+@dataclass(frozen=True, slots=True)
+class UnitSystem:
+    """
+    The units used to show temperatures, wind speeds and precipitation.
+    """
+    name: str
+    label: str
+    temperature: Unit
+    speed: Unit
+    precipitation: Unit
+
+    @property
+    def is_metric(self) -> bool:
+        return self.temperature.is_identity and self.speed.is_identity and self.precipitation.is_identity
+
+
+METRIC = UnitSystem("metric", "°C, m/s, mm", Unit("°C"), Unit("m/s"), Unit("mm"))
+METRIC_KMH = UnitSystem("metric_kmh", "°C, km/h, mm", Unit("°C"), Unit("km/h", 3.6), Unit("mm"))
+IMPERIAL = UnitSystem("imperial", "°F, mph, in", Unit("°F", 1.8, 32.0), Unit("mph", 3600 / 1609.344),
+                      Unit("in", 1 / 25.4, digits=2))
+
+UNIT_SYSTEMS = {system.name: system for system in (METRIC, METRIC_KMH, IMPERIAL)}
+
+
+# =============================
+#  Converting Results
+# =============================
+def _convert_column(column: array, unit: Unit) -> array:
+    if unit.is_identity:
+        return column
+    return array("d", unit.convert(column).tobytes())
+
+
+def convert_report(report: WeatherReport, units: UnitSystem) -> WeatherReport:
+    """
+    Return the report with current and forecast values in ``units``.
+
+    Each forecast column is converted as one array; columns without units
+    (timestamps, humidity, conditions) are shared with the original. In
+    metric the report itself is returned.
+    """
+    if units.is_metric:
+        return report
+    forecast = report.forecast
+    converted = Forecast(
+        timestamps=forecast.timestamps,
+        temperatures=_convert_column(forecast.temperatures, units.temperature),
+        humidity=forecast.humidity,
+        wind_speed=_convert_column(forecast.wind_speed, units.speed),
+        wind_deg=forecast.wind_deg,
+        precipitation=_convert_column(forecast.precipitation, units.precipitation),
+        codes=forecast.codes,
+    )
+    return dataclasses.replace(
+        report,
+        temperature=units.temperature.convert(report.temperature),
+        wind_speed=units.speed.convert(report.wind_speed),
+        forecast=converted,
+    )
+
+
+def convert_summary(summary, units: UnitSystem):
+    """
+    Return an analytics.DailySummary with every per-day array in ``units``.
+    """
+    if units.is_metric:
+        return summary
+    temperature, speed = units.temperature.convert, units.speed.convert
+    return dataclasses.replace(
+        summary,
+        temp_min=temperature(summary.temp_min),
+        temp_max=temperature(summary.temp_max),
+        temp_mean=temperature(summary.temp_mean),
+        dew_point_mean=temperature(summary.dew_point_mean),
+        feels_like_min=temperature(summary.feels_like_min),
+        feels_like_max=temperature(summary.feels_like_max),
+        wind_max=speed(summary.wind_max),
+        precipitation=units.precipitation.convert(summary.precipitation),
+    )
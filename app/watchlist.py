@@ -0,0 +1,397 @@
+# ==================================================
+# WATCHLIST: Threshold alerts per city (watchlist.py)
+# ==================================================
+#
+# Watches many cities for conditions such as strong wind, frost or a
+# thunderstorm in the next hours, and writes an event whenever an alert
+# is raised or cleared:
+#
+#   python app/watchlist.py rules.json cities.txt --interval 300
+#
+# rules.json holds a list of rules, e.g.
+#   [{"name": "gale", "field": "wind_speed", "op": ">", "value": 17, "hours": 24},
+#    {"name": "frost", "field": "temperature", "op": "<", "value": 0, "hours": 12},
+#    {"name": "thunderstorm", "field": "condition", "op": "==", "value": "thunderstorm"}]
+
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import ROOT_DIR
+from metrics import registry
+from model import WeatherReport
+from scheduler import BACKGROUND
+
+# Values a rule can test, as positions in the per-slot rows compared
+# between refreshes
+FIELDS = {"temperature": 0, "wind_speed": 1, "humidity": 2, "precipitation": 3, "condition": 4}
+
+OPERATORS = (">", ">=", "<", "<=", "==")
+
+# OpenWeatherMap condition groups, as [first, last) condition ids
+CONDITION_GROUPS = {
+    "thunderstorm": (200, 300),
+    "drizzle":      (300, 400),
+    "rain":         (500, 600),
+    "snow":         (600, 700),
+    "atmosphere":   (700, 800),
+    "clear":        (800, 801),
+    "clouds":       (801, 900),
+}
+
+SLOT_SECONDS = 3 * 3600
+
+# Row key of the current conditions; forecast rows are keyed by slot time
+CURRENT = 0
+
+# Alert transitions are appended here by the command line runner
+ALERTS_FILE = Path(os.environ.get("WEATHER_ALERTS_FILE", ROOT_DIR / "data" / "alerts.jsonl"))
+
+RAISED = "raised"
+CLEARED = "cleared"
+
+
+# =============================
+#  Rules
+# =============================
+@dataclass(frozen=True, slots=True)
+class Rule:
+    """
+    One alert condition, e.g. wind above 17 m/s within the next 24 hours.
+
+    ``field`` is a FIELDS name; "condition" compares against a
+    CONDITION_GROUPS name or a condition id. The rule matches when the
+    current conditions, or any forecast slot starting in the next
+    ``hours``, pass the test; with ``hours=0`` only the current conditions
+    and the slot under way count.
+    """
+    name: str
+    field: str
+    op: str = ">"
+    value: float | str = 0
+    hours: float = 24
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Rule":
+        return cls(**data)
+
+
+def _rule_term(rule: Rule) -> str:
+    """
+    Python expression for one rule, tested against a row ``r``.
+
+    Raises:
+        ValueError: If the field, operator or condition group is unknown.
+    """
+    if rule.field not in FIELDS:
+        raise ValueError(f"Rule {rule.name!r}: unknown field {rule.field!r}")
+    column = f"r[{FIELDS[rule.field]}]"
+    if rule.field == "condition" and isinstance(rule.value, str):
+        if rule.value not in CONDITION_GROUPS or rule.op not in ("==", "!="):
+            raise ValueError(f"Rule {rule.name!r}: use == or != with one of {sorted(CONDITION_GROUPS)}")
+        first, last = CONDITION_GROUPS[rule.value]
+        term = f"{first} <= {column} < {last}"
+        return term if rule.op == "==" else f"not {term}"
+    if rule.op not in OPERATORS:
+        raise ValueError(f"Rule {rule.name!r}: unknown operator {rule.op!r}")
+    value = float(rule.value)
+    if not math.isfinite(value):
+        raise ValueError(f"Rule {rule.name!r}: value must be a finite number")
+    return f"{column} {rule.op} {value!r}"
+
+
+def compile_rules(rules: list[Rule]):
+    """
+    Compile rules into one function of a row (temperature, wind_speed,
+    humidity, precipitation, condition id) returning a bitmask with bit
+    ``i`` set when rule ``i`` matches.
+
+    The expression is built only from FIELDS indices, OPERATORS and float
+    literals, so every changed slot costs a single call, whatever the
+    number of rules.
+
+    Raises:
+        ValueError: If a rule has an unknown field, operator or group.
+    """
+    terms = [f"(({_rule_term(rule)}) << {i})" for i, rule in enumerate(rules)]
+    return eval(f"lambda r: {' | '.join(terms) or '0'}", {})
+
+
+def load_rules(path: str | os.PathLike) -> list[Rule]:
+    """
+    Read rules from a JSON list of Rule fields.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [Rule.from_dict(item) for item in json.load(f)]
+
+
+def _same_forecast(a, b) -> bool:
+    """
+    True when two forecasts hold the same values for every rule field,
+    comparing the raw bytes of whole columns instead of building rows.
+    """
+    if a is b:
+        return True
+    return (a.timestamps.tobytes() == b.timestamps.tobytes()
+            and a.temperatures.tobytes() == b.temperatures.tobytes()
+            and a.wind_speed.tobytes() == b.wind_speed.tobytes()
+            and a.humidity.tobytes() == b.humidity.tobytes()
+            and a.precipitation.tobytes() == b.precipitation.tobytes()
+            and a.codes.tobytes() == b.codes.tobytes())
+
+
+# =============================
+#  Alert Sink
+# =============================
+class JsonlSink:
+    """
+    Appends alert events to a file, one JSON object per line.
+    """
+
+    def __init__(self, path: str | os.PathLike = ALERTS_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def __call__(self, events: list[dict]):
+        if not events:
+            return
+        lines = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+# =============================
+#  Watchlist
+# =============================
+class _CityState:
+    __slots__ = ("report", "rows", "masks", "active", "valid_until")
+
+    def __init__(self):
+        self.report = None
+        self.rows = {}              # row key -> row
+        self.masks = {}             # row key -> rules matched, for rows matching any
+        self.active = 0             # rules with a raised alert
+        self.valid_until = 0.0      # when a matching row next enters or leaves a window
+
+
+class Watchlist:
+    """
+    Alert state for many cities against one set of rules.
+
+    Rules are compiled once into a single test. Each city keeps its last
+    rows and which rules each row matched, so a refresh only tests the
+    slots whose values changed; an unchanged forecast (e.g. a cache hit)
+    costs no tests at all. Alerts are raised and cleared as matching slots
+    enter and leave the rule's window, and each transition is passed to
+    ``sink``.
+    """
+
+    def __init__(self, rules: list[Rule], sink=None):
+        self.rules = list(rules)
+        self._test = compile_rules(self.rules)
+        self._windows = [rule.hours * 3600 for rule in self.rules]
+        self.sink = sink
+        self._states = {}
+        self._lock = threading.Lock()
+        self.evaluated_slots = 0
+        self.unchanged = 0
+        self.failures = 0
+
+    def update(self, city, report: WeatherReport, now: float | None = None) -> list[dict]:
+        """
+        Evaluate a new report for a city and return the alert transitions,
+        which are also passed to the sink.
+
+        Args:
+            city: Key of the city, e.g. the name or City it was fetched with.
+            report: The latest report for the city.
+            now: Unix time the rule windows start at; the current time if None.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._states.get(city)
+            if state is None:
+                state = self._states[city] = _CityState()
+            changed = self._diff(state, report)
+            if not changed and now < state.valid_until:
+                self.unchanged += 1
+                events = []
+            else:
+                events = self._transitions(state, report, now)
+        if events:
+            for event in events:
+                registry.inc("weather_alerts_total", rule=event["rule"], event=event["event"])
+            if self.sink is not None:
+                self.sink(events)
+        return events
+
+    def _diff(self, state: _CityState, report: WeatherReport) -> bool:
+        """
+        Test the rows that changed since the city's last report and return
+        whether any did.
+        """
+        previous, state.report = state.report, report
+        rows, masks, test = state.rows, state.masks, self._test
+        changed = []
+
+        forecast = report.forecast
+        if previous is None or not _same_forecast(forecast, previous.forecast):
+            new_rows = dict(zip(forecast.timestamps, zip(forecast.temperatures, forecast.wind_speed,
+                                                          forecast.humidity, forecast.precipitation,
+                                                          forecast.codes)))
+            changed = [key for key, row in new_rows.items() if rows.get(key) != row]
+            for key in [key for key in rows if key != CURRENT and key not in new_rows]:
+                del rows[key]
+                masks.pop(key, None)
+            rows.update(new_rows)
+
+        # Current conditions have no precipitation amount; NaN fails every test
+        current = (report.temperature, report.wind_speed, report.humidity, float("nan"), report.code)
+        old = rows.get(CURRENT)
+        if old is None or old[:3] != current[:3] or old[4] != current[4]:
+            rows[CURRENT] = current
+            changed.append(CURRENT)
+
+        for key in changed:
+            mask = test(rows[key])
+            if mask:
+                masks[key] = mask
+            else:
+                masks.pop(key, None)
+        self.evaluated_slots += len(changed)
+        return bool(changed)
+
+    def _transitions(self, state: _CityState, report: WeatherReport, now: float) -> list[dict]:
+        # Earliest row in its window per matching rule, and the next time a
+        # matching row enters or leaves a window
+        hits = {}
+        valid_until = float("inf")
+        for key, mask in state.masks.items():
+            if key != CURRENT:
+                if key + SLOT_SECONDS <= now:
+                    continue
+                valid_until = min(valid_until, key + SLOT_SECONDS)
+            while mask:
+                bit = mask & -mask
+                mask ^= bit
+                i = bit.bit_length() - 1
+                if key == CURRENT or key < now + self._windows[i]:
+                    if i not in hits or key < hits[i]:
+                        hits[i] = key
+                else:
+                    valid_until = min(valid_until, key - self._windows[i])
+        state.valid_until = valid_until
+
+        active = 0
+        for i in hits:
+            active |= 1 << i
+        changed = active ^ state.active
+        state.active = active
+
+        events = []
+        for i, rule in enumerate(self.rules):
+            if not changed >> i & 1:
+                continue
+            event = {
+                "event":   RAISED if i in hits else CLEARED,
+                "rule":    rule.name,
+                "city":    report.city,
+                "country": report.country,
+                "city_id": report.city_id,
+                "time":    int(now),
+            }
+            if i in hits:
+                key = hits[i]
+                event["slot"] = report.observed_at if key == CURRENT else int(key)
+                event["value"] = state.rows[key][FIELDS[rule.field]]
+            events.append(event)
+        return events
+
+    def forget(self, city):
+        """
+        Stop tracking a city, without emitting events for its alerts.
+        """
+        with self._lock:
+            self._states.pop(city, None)
+
+    def active(self) -> list[tuple]:
+        """
+        Return the (city, rule name) pairs with a raised alert.
+        """
+        with self._lock:
+            return [(city, rule.name)
+                    for city, state in self._states.items()
+                    for i, rule in enumerate(self.rules) if state.active >> i & 1]
+
+    def run_cycle(self, cities, api_key: str, now: float | None = None) -> list[dict]:
+        """
+        Fetch every city on background priority and evaluate it as its
+        result arrives. A failed fetch leaves the city's alerts as they are.
+
+        Returns:
+            list: All alert transitions of the cycle.
+        """
+        from weather import fetch_weather_many
+
+        events = []
+        for city, report, error in fetch_weather_many(cities, api_key, priority=BACKGROUND):
+            if error is not None:
+                self.failures += 1
+                continue
+            with registry.span("watchlist"):
+                events += self.update(city, report, now)
+        return events
+
+    def stats(self) -> dict:
+        """
+        Return how many cities and alerts are tracked, and how much work
+        the refreshes took.
+        """
+        with self._lock:
+            active = sum(state.active.bit_count() for state in self._states.values())
+            return {
+                "cities":          len(self._states),
+                "active":          active,
+                "evaluated_slots": self.evaluated_slots,
+                "unchanged":       self.unchanged,
+                "failures":        self.failures,
+            }
+
+
+# =============
+# RUN
+# =============
+def main():
+    import argparse
+
+    from config import load_api_key
+
+    parser = argparse.ArgumentParser(description="Watch cities for weather alerts")
+    parser.add_argument("rules", type=Path, help="JSON file with a list of rules")
+    parser.add_argument("cities", type=Path, help="text file with one city per line")
+    parser.add_argument("--interval", type=float, default=300, help="seconds between cycles")
+    parser.add_argument("--alerts", type=Path, default=ALERTS_FILE, help="JSONL file events are appended to")
+    parser.add_argument("--once", action="store_true", help="run a single cycle and exit")
+    args = parser.parse_args()
+
+    cities = [line.strip() for line in args.cities.read_text(encoding="utf-8").splitlines() if line.strip()]
+    watchlist = Watchlist(load_rules(args.rules), sink=JsonlSink(args.alerts))
+    api_key = load_api_key()
+    while True:
+        start = time.monotonic()
+        events = watchlist.run_cycle(cities, api_key)
+        stats = watchlist.stats()
+        print(f"{len(cities)} cities, {len(events)} transitions, {stats['active']} active alerts, "
+              f"{stats['failures']} failed fetches")
+        if args.once:
+            break
+        time.sleep(max(args.interval - (time.monotonic() - start), 0))
+
+
+if __name__ == "__main__":
+    main()
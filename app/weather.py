@@ -0,0 +1,595 @@
+# =============================================
+# WEATHER LOOKUPS: UI-agnostic core (weather.py)
+# =============================================
+#
+# Everything the Streamlit app and the console share: configuration, the
+# cache, upstream requests and persistence. Nothing heavy is imported and
+# no file or socket is opened at import time, so the console starts in
+# tens of milliseconds; the store, history and metrics exporters are set
+# up on the first lookup.
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from cache import FRESH, STALE, TTLCache
+from city_index import City, CityNotFoundError, get_city_index, normalize_name
+from config import ROOT_DIR
+from http_client import FETCH_DEADLINE, get_json_many, scheduler
+from metrics import registry, start_file_exporter, start_http_server
+from model import Forecast, WeatherReport
+from prefetch import PopularityTracker, Prefetcher
+from scheduler import BACKGROUND, INTERACTIVE
+from singleflight import SingleFlight
+from store import OFF, RECORD, REPLAY, NotRecordedError, ResponseStore
+
+# ====================
+#  Fetch Weather Data
+# ====================
+# Point OWM_BASE_URL at a local stand-in (benchmarks/mock_owm.py) to run
+# without network
+BASE_URL = os.environ.get("OWM_BASE_URL", "http://api.openweathermap.org/data/2.5")
+
+# Results are always fetched, cached and stored in metric units (°C, m/s,
+# mm); units.py converts them for display, so one cache entry per city
+# serves every unit system
+UNITS = "metric"
+
+# OpenWeatherMap refreshes its data every few minutes, so recent results
+# are shared between sessions instead of being fetched again.
+CACHE_SIZE = 512
+CACHE_TTL = 300     # seconds an entry is fresh
+CACHE_GRACE = 300   # extra seconds a stale entry is served while it refreshes
+
+# The 5-day forecast has 40 three-hour slots. Callers that show fewer ask
+# for a shorter horizon, which is sent upstream as ``cnt``.
+FORECAST_SLOTS = 40
+
+# Cities fetched at the same time by fetch_weather_many
+BATCH_WORKERS = 8
+
+# Background lookups queue behind interactive ones for API quota, so they
+# are allowed to wait longer before giving up.
+BACKGROUND_DEADLINE = 120
+
+# Persistent store shared by the app processes on this host: "record"
+# saves every upstream result and warms the cache on start, "replay"
+# serves recorded results without any network, "off" disables it.
+DATA_DIR = ROOT_DIR / "data"
+STORE_MODE = os.environ.get("WEATHER_STORE_MODE", RECORD)
+STORE_PATH = Path(os.environ.get("WEATHER_STORE_PATH", DATA_DIR / "weather.sqlite3"))
+
+# Every observed current-conditions result is appended to a per-city time
+# series, unless WEATHER_HISTORY=off
+HISTORY_ENABLED = os.environ.get("WEATHER_HISTORY", "on") != "off"
+HISTORY_DIR = Path(os.environ.get("WEATHER_HISTORY_DIR", DATA_DIR / "history"))
+
+# The most looked-up cities are refreshed in the background shortly before
+# they expire, using only API quota that interactive lookups leave unused.
+PREFETCH_ENABLED = os.environ.get("WEATHER_PREFETCH", "on") != "off"
+PREFETCH_TOP_K = 50         # most popular cities kept warm
+PREFETCH_INTERVAL = 15      # seconds between prefetch rounds
+PREFETCH_LEAD_TIME = 60     # refresh when an entry has less fresh time left
+PREFETCH_HALF_LIFE = 3600   # seconds for a lookup's popularity to halve
+PREFETCH_RESERVE = 4        # quota tokens always left for interactive lookups
+PREFETCH_MIN_SCORE = 0.5    # cities less popular than this are no longer refreshed
+
+# Lookup timings and counters can be scraped in Prometheus text format from
+# http://127.0.0.1:<WEATHER_METRICS_PORT>/metrics, or written to
+# WEATHER_METRICS_FILE every few seconds
+METRICS_PORT = int(os.environ.get("WEATHER_METRICS_PORT", 0))
+METRICS_FILE = os.environ.get("WEATHER_METRICS_FILE")
+METRICS_FILE_INTERVAL = 15
+
+# What a failed lookup can raise; fetch_weather turns these into None.
+# requests' RequestException is an OSError, so requests itself need not be
+# imported to catch it.
+LOOKUP_ERRORS = (OSError, CityNotFoundError, NotRecordedError)
+
+# Why a lookup failed, as told to users: the city does not exist, the API
+# key is wrong or revoked (retrying will not help), or the service could not
+# answer (quota, 429/5xx, network) and a retry may work
+NOT_FOUND = "not_found"
+BAD_API_KEY = "bad_api_key"
+UNAVAILABLE = "unavailable"
+
+weather_cache = TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL, grace=CACHE_GRACE)
+
+# Concurrent lookups of the same city share one upstream request
+upstream_flights = SingleFlight()
+
+response_store = None
+_started = False
+_warmed = False
+_history = None
+_history_opened = False
+_start_lock = threading.Lock()
+
+
+def open_store() -> ResponseStore | None:
+    """
+    Open the persistent response store, or return None if it is disabled
+    or cannot be opened (e.g. on a read-only filesystem).
+    """
+    if STORE_MODE == OFF:
+        return None
+    try:
+        return ResponseStore(STORE_PATH)
+    except (sqlite3.Error, OSError):
+        return None
+
+
+def warm_cache(store: ResponseStore | None) -> int:
+    """
+    Load results recorded by any process within the cache lifetime into
+    the in-memory cache, keeping their real age. A store that is busy or
+    unreadable is skipped; lookups then simply start from an empty cache.
+
+    Returns:
+        int: Number of entries loaded.
+    """
+    if store is None:
+        return 0
+    now = time.time()
+    try:
+        recent = list(store.recent(CACHE_TTL + CACHE_GRACE, limit=CACHE_SIZE))
+    except sqlite3.Error:
+        return 0
+    # Oldest first, so the newest entries end up most recently used
+    for key, fetched_at, report in reversed(recent):
+        weather_cache.set(key, report, age=max(now - fetched_at, 0.0))
+    return len(recent)
+
+
+def open_history():
+    """
+    Open the observation history store, or return None if it is disabled
+    or its directory cannot be created.
+
+    Returns:
+        HistoryStore | None: The opened store.
+    """
+    if not HISTORY_ENABLED:
+        return None
+    from history import HistoryStore
+    try:
+        return HistoryStore(HISTORY_DIR)
+    except OSError:
+        return None
+
+
+def get_history():
+    """
+    Return the observation history store, opening it on first use. The
+    history (and NumPy with it) is only loaded once a result is observed
+    upstream or the app shows a trend.
+
+    Returns:
+        HistoryStore | None: None when history is disabled or unavailable.
+    """
+    global _history, _history_opened
+    if not _history_opened:
+        with _start_lock:
+            if not _history_opened:
+                _history = open_history()
+                _history_opened = True
+    return _history
+
+
+def _prefetch(key: tuple, city: str | City, api_key: str):
+    """
+    Refresh one popular city ahead of expiry on background priority.
+    """
+    weather_cache.set(key, _load_weather_once(key, city, api_key, BACKGROUND))
+
+
+popularity = PopularityTracker(half_life=PREFETCH_HALF_LIFE)
+prefetcher = Prefetcher(popularity, weather_cache, scheduler, _prefetch,
+                        top_k=PREFETCH_TOP_K, interval=PREFETCH_INTERVAL,
+                        lead_time=PREFETCH_LEAD_TIME, reserve_tokens=PREFETCH_RESERVE,
+                        min_score=PREFETCH_MIN_SCORE)
+
+def gauges() -> dict:
+    """
+    Current cache, quota, coalescing and prefetch state, read on every
+    metrics export.
+    """
+    values = {}
+    for prefix, stats in (("weather_cache", weather_cache.stats()),
+                          ("weather_quota", scheduler.stats()),
+                          ("weather_flights", upstream_flights.stats()),
+                          ("weather_prefetch", prefetcher.stats())):
+        for name, value in stats.items():
+            values[f"{prefix}_{name}"] = value
+    return values
+
+
+def start_metrics_exporters():
+    """
+    Start the configured metrics endpoint and file writer, if any. A port
+    that is already taken (e.g. by another app process) is skipped.
+    """
+    registry.register_collector(gauges)
+    if METRICS_PORT:
+        try:
+            start_http_server(registry, METRICS_PORT)
+        except OSError:
+            pass
+    if METRICS_FILE:
+        start_file_exporter(registry, METRICS_FILE, METRICS_FILE_INTERVAL)
+
+
+def ensure_started(warm: bool = False):
+    """
+    Open the response store and start the metrics exporters. Runs once per
+    process, on the first lookup; call it earlier to have that done before
+    anyone is waiting.
+
+    With ``warm``, the cache is also filled from the store once. That pays
+    off in a long-lived server; a short run (the console, a cron job) only
+    reads the stored results it looks up, on a cache miss.
+    """
+    global response_store, _started, _warmed
+    if _started and (_warmed or not warm):
+        return
+    with _start_lock:
+        if not _started:
+            response_store = open_store()
+            start_metrics_exporters()
+            _started = True
+        if warm and not _warmed:
+            # Best effort and only tried once, so a locked store never
+            # holds up later script runs
+            _warmed = True
+            warm_cache(response_store)
+
+
+def resolve_city(city: str | City) -> str | City:
+    """
+    Resolve user input to what is sent upstream, before any network call.
+
+    With a local city index, a name that matches one city becomes that
+    City (queried by id) and a plain name with no match is rejected.
+    Ambiguous names, and queries with a state or country suffix the index
+    cannot match, are left for OpenWeatherMap to geocode. Without an index
+    the name is used as it is.
+
+    Raises:
+        CityNotFoundError: If the index has no city with that plain name.
+    """
+    if isinstance(city, City):
+        return city
+    index = get_city_index()
+    if index is None:
+        return city
+    matches = index.resolve(city)
+    if len(matches) == 1:
+        return matches[0]
+    if not matches and "," not in city:
+        raise CityNotFoundError(city)
+    return city
+
+
+def cache_key(city: str | City) -> tuple:
+    """
+    Build the cache key for a city lookup: the city id, or the normalized
+    name when the city could not be resolved to an id.
+    """
+    if isinstance(city, City):
+        return (city.id,)
+    return (normalize_name(city),)
+
+
+def fetch_weather(city: str | City, api_key: str, priority: int = INTERACTIVE,
+                  horizon: int | None = None) -> WeatherReport | None:
+    """
+    Fetch current weather and 5-day forecast (3-hour intervals) for a specific city.
+
+    Results are served from the shared cache when possible. A stale entry
+    is returned at once and refreshed in the background. On a miss,
+    concurrent callers asking for the same city wait on a single upstream
+    request. Upstream calls are paced by the shared quota scheduler, where
+    ``priority`` decides who goes first. Names unknown to the local city
+    index are rejected without any request.
+
+    Interactive lookups count towards a city's popularity, and the most
+    popular cities are kept fresh by the background prefetcher.
+
+    ``horizon`` limits the forecast to its first slots (all 40 by default).
+    A cached result with at least that many slots is reused as it is.
+
+    Returns None when the lookup fails; use ``lookup_weather`` to learn why.
+    """
+    return lookup_weather(city, api_key, priority, horizon)[0]
+
+
+def lookup_weather(city: str | City, api_key: str, priority: int = INTERACTIVE,
+                   horizon: int | None = None) -> tuple[WeatherReport | None, Exception | None]:
+    """
+    Like ``fetch_weather``, but also return the error of a failed lookup.
+
+    Returns:
+        tuple: (data, error): the WeatherReport and None, or None and the
+            exception, which ``failure_reason`` turns into NOT_FOUND,
+            BAD_API_KEY or UNAVAILABLE.
+    """
+    # Request Validation
+    start = time.perf_counter()
+    try:
+        data = _get_weather(city, api_key, priority, horizon)
+    except LOOKUP_ERRORS as e:
+        registry.observe("weather_lookup_seconds", time.perf_counter() - start, result=type(e).__name__)
+        return None, e
+    registry.observe("weather_lookup_seconds", time.perf_counter() - start, result="ok")
+    return data, None
+
+
+def failure_reason(error: Exception) -> str:
+    """
+    Return NOT_FOUND when a failed lookup means the city does not exist
+    (unknown to the city index, or a 400/404 answer), BAD_API_KEY when the
+    key was refused (401/403), else UNAVAILABLE.
+    """
+    if isinstance(error, CityNotFoundError):
+        return NOT_FOUND
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status in (400, 404):
+        return NOT_FOUND
+    if status in (401, 403):
+        return BAD_API_KEY
+    return UNAVAILABLE
+
+
+def fetch_weather_many(cities, api_key: str, max_workers: int = BATCH_WORKERS,
+                       priority: int = BACKGROUND, horizon: int | None = None):
+    """
+    Fetch weather for many cities, yielding each result as soon as it is ready.
+
+    At most ``max_workers`` cities are in flight at once, and ``cities`` is
+    consumed lazily, so long or endless iterables are fine. Every result
+    goes through the same cache and request coalescing as ``fetch_weather``.
+
+    Args:
+        cities: Iterable of city names or City entries.
+        api_key: OpenWeatherMap API key.
+        max_workers: Number of cities fetched concurrently.
+        priority: Quota priority, BACKGROUND unless a user is waiting.
+        horizon: Number of forecast slots needed, all of them if None.
+
+    Yields:
+        tuple: (city, data, error) in completion order. ``data`` is the
+            WeatherReport that ``fetch_weather`` returns, or None when the
+            lookup failed; ``error`` is the exception in that case.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    cities = iter(cities)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="owm-batch") as pool:
+        pending = {}
+
+        def _submit_next() -> bool:
+            city = next(cities, None)
+            if city is None:
+                return False
+            pending[pool.submit(_get_weather, city, api_key, priority, horizon)] = city
+            return True
+
+        for _ in range(max_workers):
+            if not _submit_next():
+                break
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                city = pending.pop(future)
+                error = future.exception()
+                yield city, (None if error else future.result()), error
+                _submit_next()
+
+
+def fetch_weather_near(lat: float, lon: float, api_key: str, k: int = 1,
+                       max_workers: int = BATCH_WORKERS, priority: int = INTERACTIVE,
+                       horizon: int | None = None):
+    """
+    Fetch weather for the ``k`` cities nearest to a coordinate.
+
+    Cities are found in the local city index, then fetched in batch.
+
+    Yields:
+        tuple: (city, data, error) as in ``fetch_weather_many``.
+
+    Raises:
+        CityNotFoundError: If no city index has been built.
+    """
+    index = _require_city_index()
+    cities = [city for city, _ in index.nearest(lat, lon, k)]
+    return fetch_weather_many(cities, api_key, max_workers=max_workers, priority=priority,
+                              horizon=horizon)
+
+
+def fetch_weather_in_region(south: float, west: float, north: float, east: float, api_key: str,
+                            limit: int | None = None, max_workers: int = BATCH_WORKERS,
+                            priority: int = BACKGROUND, horizon: int | None = None):
+    """
+    Fetch weather for every indexed city inside a bounding box, e.g. for a
+    map view. ``west > east`` means the box crosses the antimeridian.
+
+    Yields:
+        tuple: (city, data, error) as in ``fetch_weather_many``.
+
+    Raises:
+        CityNotFoundError: If no city index has been built.
+    """
+    index = _require_city_index()
+    cities = index.within(south, west, north, east, limit=limit)
+    return fetch_weather_many(cities, api_key, max_workers=max_workers, priority=priority,
+                              horizon=horizon)
+
+
+def _require_city_index():
+    index = get_city_index()
+    if index is None:
+        raise CityNotFoundError("No local city index; build one with city_index.py")
+    return index
+
+
+def _get_weather(city: str | City, api_key: str, priority: int = INTERACTIVE,
+                 horizon: int | None = None) -> WeatherReport:
+    """
+    Return weather for a city from the cache, loading it on a miss or when
+    the cached forecast is shorter than ``horizon``.
+
+    Raises:
+        CityNotFoundError: If the city is not in the local index.
+        NotRecordedError: In replay mode, if the city was never recorded.
+        requests.exceptions.RequestException: If the upstream lookup fails.
+    """
+    ensure_started()
+    city = resolve_city(city)
+    key = cache_key(city)
+    slots = _forecast_slots(horizon)
+    data, outcome = weather_cache.lookup(key)
+    if data is None and _load_stored(key):
+        data, outcome = weather_cache.lookup(key)
+    if data is not None and len(data.forecast) < slots:
+        outcome = "short"
+    registry.inc("weather_cache_total", outcome=outcome)
+    if outcome in (FRESH, STALE):
+        if outcome == STALE:
+            refresh_slots = max(slots, len(data.forecast))
+            weather_cache.refresh_async(
+                key, lambda: _load_weather_once(key, city, api_key, BACKGROUND, refresh_slots)
+            )
+    else:
+        data = _load_weather_once(key, city, api_key, priority, slots)
+        weather_cache.set(key, data)
+
+    # Only lookups that succeeded count, so a typo is never refreshed
+    if priority == INTERACTIVE and PREFETCH_ENABLED:
+        popularity.record(key, city, api_key)
+        prefetcher.ensure_started()
+    return data
+
+
+def _load_stored(key: tuple) -> bool:
+    """
+    On a cache miss in record mode, put the stored result for ``key`` in the
+    cache if it is still within the cache lifetime, with its real age. This
+    also picks up results other processes stored after this one started.
+
+    Returns:
+        bool: True if a stored result was cached.
+    """
+    if STORE_MODE != RECORD or response_store is None:
+        return False
+    try:
+        stored = response_store.get(key)
+    except sqlite3.Error:
+        return False
+    if stored is None:
+        return False
+    fetched_at, report = stored
+    age = max(time.time() - fetched_at, 0.0)
+    if age >= CACHE_TTL + CACHE_GRACE:
+        return False
+    weather_cache.set(key, report, age=age)
+    return True
+
+
+def _forecast_slots(horizon: int | None) -> int:
+    if horizon is None:
+        return FORECAST_SLOTS
+    return min(max(int(horizon), 1), FORECAST_SLOTS)
+
+
+def _load_weather_once(key: tuple, city: str | City, api_key: str, priority: int = INTERACTIVE,
+                       slots: int = FORECAST_SLOTS) -> WeatherReport:
+    """
+    Load a city through the single-flight group, so that only one upstream
+    request per cache key is in flight at any time.
+
+    In record mode the result is also saved to the persistent store; in
+    replay mode it comes from the store and nothing is sent upstream. Each
+    new upstream observation is appended to the history store. A store
+    that is locked or broken never fails the lookup: the result is just
+    not saved (or, in replay mode, counts as not recorded).
+
+    Loads of different forecast lengths do not share a flight, so a short
+    request never hands a trimmed forecast to a caller that needs more.
+    """
+    def _load():
+        if STORE_MODE == REPLAY:
+            try:
+                recorded = response_store.get(key) if response_store is not None else None
+            except sqlite3.Error:
+                recorded = None
+            if recorded is None or len(recorded[1].forecast) < slots:
+                raise NotRecordedError(key)
+            return recorded[1]
+
+        report = _load_weather(city, api_key, priority, slots)
+        if response_store is not None:
+            try:
+                response_store.put(key, report)
+            except sqlite3.Error:
+                pass
+        history = get_history()
+        if history is not None:
+            try:
+                history.append(report)
+            except OSError:
+                pass
+        return report
+
+    return upstream_flights.do((*key, slots), _load)
+
+
+def _load_weather(city: str | City, api_key: str, priority: int = INTERACTIVE,
+                  slots: int = FORECAST_SLOTS) -> WeatherReport:
+    """
+    Fetch a city from OpenWeatherMap, bypassing the cache.
+
+    Both upstream calls are sent at the same time over a shared keep-alive
+    session, each with its own timeout and under one overall deadline.
+    Only the first ``slots`` forecast entries are requested.
+
+    Raises:
+        requests.exceptions.RequestException: If either call fails.
+    """
+    query = {"id": city.id} if isinstance(city, City) else {"q": city}
+    params = {**query, "units": UNITS, "appid": api_key}
+    deadline = FETCH_DEADLINE if priority == INTERACTIVE else BACKGROUND_DEADLINE
+    forecast_params = params if slots >= FORECAST_SLOTS else {**params, "cnt": slots}
+    current_data, forecast_data = get_json_many([
+        (f"{BASE_URL}/weather", params),
+        (f"{BASE_URL}/forecast", forecast_params),
+    ], deadline=deadline, priority=priority)
+
+    with registry.span("extract"):
+        return WeatherReport.from_owm(current_data, forecast_data)
+
+
+# =============================
+# Extract & Format Weather Data
+# =============================
+def extract_weather_info(data) -> WeatherReport:
+    """
+    Prepare weather information for display based on current + forecast data.
+
+    A WeatherReport is returned as it is, without copying. A legacy dict in
+    the old ``fetch_weather`` shape is converted once.
+    """
+    if isinstance(data, WeatherReport):
+        return data
+    return WeatherReport(
+        city=data.get("city", ""),
+        country=data.get("country", ""),
+        temperature=data["temperature"],
+        description=data["description"],
+        humidity=data["humidity"],
+        wind_speed=data["wind_speed"],
+        wind_deg=data["wind_deg"],
+        forecast=Forecast.from_owm(data.get("forecast", [])),
+    )
@@ -0,0 +1,297 @@
+# ======================================================
+# LOAD TEST: Concurrent Streamlit sessions (load_test.py)
+# ======================================================
+#
+# Drives N simulated users through the real app/app.py script with
+# Streamlit's AppTest, against the local mock upstream, in one process -
+# i.e. one replica. Each user enters cities, clicks "Check Weather" and
+# switches language:
+#
+#   poetry run python benchmarks/load_test.py --sessions 20 --rounds 5
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Keep Streamlit's per-run warnings (e.g. about empty widget labels) out of
+# the report
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+import streamlit as st
+import streamlit.testing.v1.app_test as app_test
+import streamlit.testing.v1.local_script_runner as local_script_runner
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.runtime.secrets import Secrets
+from streamlit.testing.v1.util import patch_config_options
+from streamlit.testing.v1 import AppTest
+
+from mock_owm import MockOWM
+from run import RESULTS_DIR, ROOT, git_commit, summarize
+
+APP_SCRIPT = ROOT / "app" / "app.py"
+LANGUAGES = ("English", "עברית")
+
+# Popular cities are asked for far more often than the rest, so a realistic
+# share of lookups can be served from the cache
+CITY_POOL = [
+    "London", "Paris", "Tel Aviv", "New York", "Tokyo", "Berlin", "Madrid", "Rome",
+    "Haifa", "Jerusalem", "Sydney", "Toronto", "Mumbai", "Cairo", "Lima", "Oslo",
+    "Vienna", "Prague", "Lisbon", "Athens", "Dublin", "Seoul", "Bangkok", "Nairobi",
+]
+
+
+# =============================
+#  Simulated User
+# =============================
+class Session:
+    """
+    One simulated user with its own AppTest (and so its own session state).
+    """
+
+    # Newer Streamlit versions scan the installed packages for components on
+    # the first run of every AppTest; a server does that once, so sessions
+    # share the first result
+    _components = None
+
+    def __init__(self, timeout: float):
+        self.app = AppTest.from_file(str(APP_SCRIPT), default_timeout=timeout)
+        if Session._components is not None:
+            self.app._bidi_component_manager = Session._components
+        self.language = LANGUAGES[0]
+
+    def _timed_run(self, widget=None) -> float:
+        start = time.perf_counter()
+        (widget or self.app).run()
+        elapsed = time.perf_counter() - start
+        if self.app.exception:
+            raise RuntimeError(self.app.exception[0].message)
+        return elapsed
+
+    def open(self) -> float:
+        elapsed = self._timed_run()
+        if Session._components is None:
+            Session._components = getattr(self.app, "_bidi_component_manager", None)
+        return elapsed
+
+    def enter_city(self, city: str) -> float:
+        return self._timed_run(self.app.text_input(key="city_input").input(city))
+
+    def check_weather(self) -> float:
+        return self._timed_run(self.app.button[0].click())
+
+    def switch_language(self) -> float:
+        self.language = LANGUAGES[1] if self.language == LANGUAGES[0] else LANGUAGES[0]
+        return self._timed_run(self.app.selectbox(key="lang_select").select(self.language))
+
+
+class _SharedInstance(type(Runtime)):
+    def __setattr__(cls, name, value):
+        if name != "_instance":
+            super().__setattr__(name, value)
+        elif value is not None and Runtime._instance is None:
+            Runtime._instance = value
+
+
+class _SharedRuntime(Runtime, metaclass=_SharedInstance):
+    pass
+
+
+_app_test_options = None
+
+
+def share_runtime():
+    """
+    Let concurrent AppTest sessions share one runtime, as sessions of a
+    real server do.
+
+    Around every run AppTest installs a mock Runtime and turns on the
+    ``global.appTest`` option, then undoes both, which pulls them from under
+    any session still running. With this shim the first mock is kept, and
+    the option stays on for the whole process. The compiled script is also
+    shared, as on a server, instead of being recompiled for every run.
+    """
+    global _app_test_options
+    script_cache = ScriptCache()
+    script_cache.get_bytecode(str(APP_SCRIPT))
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    app_test.Runtime = _SharedRuntime
+    _app_test_options = patch_config_options({"global.appTest": True})
+    _app_test_options.__enter__()
+    app_test.patch_config_options = lambda options: contextlib.nullcontext()
+
+
+def use_secrets(values: dict):
+    """
+    Install secrets for every session at once. AppTest.secrets swaps the
+    global st.secrets around each run, which races between sessions run
+    at the same time, so all sessions share one set instead.
+    """
+    secrets = Secrets()
+    secrets._secrets = dict(values)
+    st.secrets = secrets
+
+
+def pick_city(rng: random.Random) -> str:
+    """
+    Pick a city with a Zipf-like popularity distribution.
+    """
+    weights = [1 / (rank + 1) for rank in range(len(CITY_POOL))]
+    return rng.choices(CITY_POOL, weights)[0]
+
+
+def run_user(index: int, args, timings: dict, lock: threading.Lock):
+    """
+    Open the app, then do ``args.rounds`` rounds of enter city, check
+    weather and switch language, recording every script run.
+    """
+    rng = random.Random(args.seed + index)
+    session = Session(args.timeout)
+    steps = [("open", session.open)]
+    for _ in range(args.rounds):
+        city = pick_city(rng)
+        steps += [
+            ("enter_city", lambda city=city: session.enter_city(city)),
+            ("check_weather", session.check_weather),
+            ("switch_language", session.switch_language),
+        ]
+    for action, step in steps:
+        try:
+            elapsed = step()
+        except Exception as e:
+            message = f"{action}: {type(e).__name__}: {e}"
+            with lock:
+                errors = timings.setdefault("errors", {})
+                errors[message] = errors.get(message, 0) + 1
+            continue
+        with lock:
+            timings.setdefault(action, []).append(elapsed)
+        if args.think:
+            time.sleep(rng.uniform(0, 2 * args.think))
+    return session
+
+
+# =============================
+#  Measurements
+# =============================
+def measure_load(args, mock: MockOWM) -> dict:
+    """
+    Run ``args.sessions`` users at the same time and summarize run times
+    per action and upstream calls per action.
+    """
+    timings, lock = {}, threading.Lock()
+    mock.reset_stats()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions, thread_name_prefix="load-user") as pool:
+        for future in [pool.submit(run_user, i, args, timings, lock) for i in range(args.sessions)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    errors = timings.pop("errors", {})
+    upstream = mock.stats()
+    upstream_calls = sum(upstream.values())
+    all_runs = [t for samples in timings.values() for t in samples]
+    return {
+        "sessions":       args.sessions,
+        "rounds":         args.rounds,
+        "seconds":        elapsed,
+        "runs_per_sec":   len(all_runs) / elapsed,
+        "errors":         sum(errors.values()),
+        "error_messages": errors,
+        "script_run":     summarize(all_runs),
+        "per_action":     {action: summarize(samples) for action, samples in timings.items()},
+        "upstream":       upstream,
+        "upstream_calls_per_action": {
+            "any":           upstream_calls / max(len(all_runs), 1),
+            "check_weather": upstream_calls / max(len(timings.get("check_weather", [])), 1),
+        },
+    }
+
+
+def measure_memory(args) -> dict:
+    """
+    Python heap held per live session, measured with tracemalloc over a few
+    sessions run one after another (kept out of the timed run, since
+    tracing slows everything down).
+    """
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    sessions = [run_user(-2 - i, args, {}, threading.Lock()) for i in range(args.memory_sessions)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessions
+    return {
+        "sessions":          args.memory_sessions,
+        "bytes_per_session": (current - baseline) / max(args.memory_sessions, 1),
+        "peak_bytes":        peak - baseline,
+    }
+
+
+# =============
+# RUN
+# =============
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for app/app.py")
+    parser.add_argument("--sessions", type=int, default=10, help="simulated users at the same time")
+    parser.add_argument("--rounds", type=int, default=5, help="city lookups per user")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds between actions")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds allowed per script run")
+    parser.add_argument("--memory-sessions", type=int, default=5, help="sessions used for the memory estimate")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock upstream latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, help="result file (default: results/load-<commit>-<sessions>.json)")
+    args = parser.parse_args()
+    share_runtime()
+    use_secrets({"api_key": "load-test"})
+
+    mock = MockOWM(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                   throttle_rate=args.throttle_rate, retry_after=0, seed=args.seed)
+    os.environ["OWM_BASE_URL"] = mock.base_url
+    with mock:
+        # One user first, so imports and the compiled script are in place
+        # before anything is timed, as on a replica that has served traffic
+        run_user(-1, args, {}, threading.Lock())
+        load = measure_load(args, mock)
+        memory = measure_memory(args)
+
+    commit = git_commit()
+    output = {
+        "commit":    commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "mock":      {"latency": args.latency, "jitter": args.jitter,
+                      "error_rate": args.error_rate, "throttle_rate": args.throttle_rate},
+        "load":      load,
+        "memory":    memory,
+    }
+    out = args.out or RESULTS_DIR / f"load-{commit}-{args.sessions}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(output, indent=2, ensure_ascii=False))
+
+    run = load["script_run"]
+    print(f"{args.sessions} sessions, {load['runs_per_sec']:.1f} script runs/s, {load['errors']} errors")
+    for message, count in load["error_messages"].items():
+        print(f"  {count} x {message}")
+    print(f"script run  p50 {run['p50_ms']:.1f} ms | p95 {run['p95_ms']:.1f} ms | p99 {run['p99_ms']:.1f} ms")
+    for action, stats in load["per_action"].items():
+        print(f"  {action:<16} p50 {stats['p50_ms']:.1f} ms | p95 {stats['p95_ms']:.1f} ms | p99 {stats['p99_ms']:.1f} ms")
+    calls = load["upstream_calls_per_action"]
+    print(f"upstream calls per action {calls['any']:.2f}, per Check Weather {calls['check_weather']:.2f}")
+    print(f"memory per session {memory['bytes_per_session'] / 1024:.0f} KiB")
+    print(f"Saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+# ==========================================================
+# MOCK UPSTREAM: Local OpenWeatherMap stand-in (mock_owm.py)
+# ==========================================================
+#
+# Serves /data/2.5/weather and /data/2.5/forecast with synthetic data, so
+# the app and the benchmarks can run without network or an API key:
+#
+#   python benchmarks/mock_owm.py --port 8765 --latency 0.05 --error-rate 0.01
+#   OWM_BASE_URL=http://127.0.0.1:8765/data/2.5 poetry run streamlit run app/app.py
+
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FORECAST_SLOTS = 40
+SLOT_SECONDS = 3 * 3600
+
+# (condition id, description) pairs the synthetic data is drawn from
+CONDITIONS = [
+    (800, "clear sky"),
+    (801, "few clouds"),
+    (802, "scattered clouds"),
+    (803, "broken clouds"),
+    (521, "shower rain"),
+    (500, "rain"),
+    (211, "thunderstorm"),
+    (600, "snow"),
+    (701, "mist"),
+]
+
+# Names the mock answers with 404, like OpenWeatherMap does for unknown cities
+UNKNOWN_CITIES = {"nowhere", "atlantis"}
+
+
+# =============================
+#  Synthetic Weather Data
+# =============================
+def _city_seed(query: str) -> int:
+    return zlib.crc32(query.strip().lower().encode())
+
+
+def _city_id(query: str) -> int:
+    if query.isdigit():
+        return int(query)
+    return 1_000_000 + _city_seed(query) % 9_000_000
+
+
+def current_payload(query: str, now: int) -> dict:
+    """
+    Build a /weather body for a city name or id, stable for a given hour.
+    """
+    rng = random.Random(_city_seed(query) ^ (now // 3600))
+    code, description = rng.choice(CONDITIONS)
+    name = f"City {query}" if query.isdigit() else query.strip().title()
+    temp = round(rng.uniform(-10, 35), 2)
+    return {
+        "coord": {"lon": round(rng.uniform(-180, 180), 4), "lat": round(rng.uniform(-60, 70), 4)},
+        "weather": [{"id": code, "main": description.split()[-1].title(), "description": description, "icon": "01d"}],
+        "base": "stations",
+        "main": {"temp": temp, "feels_like": temp - 1, "temp_min": temp - 2, "temp_max": temp + 2,
+                 "pressure": 1013, "humidity": rng.randint(20, 100)},
+        "visibility": 10000,
+        "wind": {"speed": round(rng.uniform(0, 15), 2), "deg": rng.randint(0, 359)},
+        "clouds": {"all": rng.randint(0, 100)},
+        "dt": now - now % 600,
+        "sys": {"type": 2, "id": 1, "country": "XX", "sunrise": now - 20000, "sunset": now + 20000},
+        "timezone": 0,
+        "id": _city_id(query),
+        "name": name,
+        "cod": 200,
+    }
+
+
+def forecast_payload(query: str, now: int, cnt: int = FORECAST_SLOTS) -> dict:
+    """
+    Build a /forecast body with ``cnt`` three-hour slots.
+    """
+    rng = random.Random(_city_seed(query) ^ (now // SLOT_SECONDS))
+    start = now - now % SLOT_SECONDS + SLOT_SECONDS
+    entries = []
+    for i in range(max(1, min(cnt, FORECAST_SLOTS))):
+        dt = start + i * SLOT_SECONDS
+        code, description = rng.choice(CONDITIONS)
+        temp = round(rng.uniform(-10, 35), 2)
+        entry = {
+            "dt": dt,
+            "main": {"temp": temp, "feels_like": temp - 1, "temp_min": temp - 1, "temp_max": temp + 1,
+                     "pressure": 1013, "sea_level": 1013, "grnd_level": 1008,
+                     "humidity": rng.randint(20, 100), "temp_kf": 0},
+            "weather": [{"id": code, "main": description.split()[-1].title(), "description": description, "icon": "01d"}],
+            "clouds": {"all": rng.randint(0, 100)},
+            "wind": {"speed": round(rng.uniform(0, 15), 2), "deg": rng.randint(0, 359), "gust": 3.0},
+            "visibility": 10000,
+            "pop": round(rng.random(), 2),
+            "sys": {"pod": "d"},
+            "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(dt)),
+        }
+        if code in (500, 521, 211):
+            entry["rain"] = {"3h": round(rng.uniform(0.1, 5), 2)}
+        elif code == 600:
+            entry["snow"] = {"3h": round(rng.uniform(0.1, 3), 2)}
+        entries.append(entry)
+    current = current_payload(query, now)
+    return {
+        "cod": "200", "message": 0, "cnt": len(entries), "list": entries,
+        "city": {"id": current["id"], "name": current["name"], "coord": current["coord"],
+                 "country": "XX", "population": 100000, "timezone": 0,
+                 "sunrise": now - 20000, "sunset": now + 20000},
+    }
+
+
+# =============================
+#  HTTP Server
+# =============================
+class MockOWM:
+    """
+    Threaded mock of the OpenWeatherMap 2.5 endpoints.
+
+    Args:
+        port: Port to listen on; 0 picks a free one.
+        latency: Seconds added to every response.
+        jitter: Up to this many extra random seconds per response.
+        error_rate: Fraction of calls answered with 500.
+        throttle_rate: Fraction of calls answered with 429 and Retry-After.
+        retry_after: Seconds sent in the Retry-After header.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 retry_after: float = 1, seed: int | None = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/data/2.5"
+
+    def start(self) -> "MockOWM":
+        """
+        Serve in a background thread and return self.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-owm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def stats(self) -> dict:
+        """
+        Return the number of responses per endpoint and status.
+        """
+        with self._lock:
+            return dict(self.counts)
+
+    def reset_stats(self):
+        with self._lock:
+            self.counts.clear()
+
+    def _outcome(self) -> tuple[float, int]:
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            roll = self._rng.random()
+        if roll < self.throttle_rate:
+            return delay, 429
+        if roll < self.throttle_rate + self.error_rate:
+            return delay, 500
+        return delay, 200
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; without this, delayed
+            # ACKs add ~40 ms to every keep-alive response
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+                if url.path == "/_stats":
+                    return self._send(200, mock.stats())
+                if endpoint not in ("weather", "forecast"):
+                    mock._count("not_found")
+                    return self._send(404, {"cod": "404", "message": "Not found"})
+
+                delay, status = mock._outcome()
+                if delay:
+                    time.sleep(delay)
+                query = params.get("id") or params.get("q", "")
+
+                def reply(status: int, body: dict, headers: dict | None = None):
+                    # Counted by the status actually sent
+                    mock._count(f"{endpoint}_{status}")
+                    return self._send(status, body, headers)
+
+                if status == 429:
+                    return reply(429, {"cod": 429, "message": "Too many requests"},
+                                 {"Retry-After": f"{mock.retry_after:g}"})
+                if status == 500:
+                    return reply(500, {"cod": "500", "message": "Internal error"})
+                if not params.get("appid"):
+                    return reply(401, {"cod": 401, "message": "Invalid API key"})
+                if not query or query.strip().lower() in UNKNOWN_CITIES:
+                    return reply(404, {"cod": "404", "message": "city not found"})
+
+                now = int(time.time())
+                if endpoint == "weather":
+                    body = current_payload(query, now)
+                else:
+                    body = forecast_payload(query, now, int(params.get("cnt", FORECAST_SLOTS)))
+                reply(200, body)
+
+            def _send(self, status: int, body: dict, headers: dict | None = None):
+                data = json.dumps(body, separators=(",", ":")).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    data = gzip.compress(data, compresslevel=5)
+                    self.send_header("Content-Encoding", "gzip")
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+# =============
+# RUN
+# =============
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenWeatherMap stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1, help="Retry-After seconds on 429")
+    args = parser.parse_args()
+
+    mock = MockOWM(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                   error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                   retry_after=args.retry_after)
+    print(f"Mock OpenWeatherMap at {mock.base_url}")
+    try:
+        mock._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
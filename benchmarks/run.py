@@ -0,0 +1,253 @@
+# ==================================================
+# BENCHMARKS: End-to-end performance suite (run.py)
+# ==================================================
+#
+# Runs every benchmark against the local mock upstream and saves the
+# results as JSON, so runs can be compared across commits:
+#
+#   poetry run python benchmarks/run.py
+#   poetry run python benchmarks/run.py --compare benchmarks/results/<old>.json
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from mock_owm import MockOWM, current_payload, forecast_payload
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# The app reads its configuration at import time, so the environment is set
+# before weather is imported: no persistence, no prefetch, no local city index
+# (the mock makes up any city it is asked for), and a quota the scheduler
+# never has to enforce against the mock.
+os.environ.setdefault("WEATHER_STORE_MODE", "off")
+os.environ.setdefault("WEATHER_HISTORY", "off")
+os.environ.setdefault("WEATHER_PREFETCH", "off")
+os.environ.setdefault("CITY_INDEX_DIR", str(RESULTS_DIR / "no-city-index"))
+os.environ.setdefault("OWM_CALLS_PER_MINUTE", "1000000")
+sys.path.insert(0, str(ROOT / "app"))
+
+
+# =============================
+#  Timing Helpers
+# =============================
+def percentile(samples: list[float], q: float) -> float:
+    """
+    Return the ``q`` quantile (0..1) of samples, by linear interpolation.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def summarize(samples: list[float], **extra) -> dict:
+    """
+    Summarize per-call timings (seconds) in milliseconds.
+    """
+    ms = [s * 1000 for s in samples]
+    return {
+        "n":       len(ms),
+        "mean_ms": statistics.fmean(ms),
+        "p50_ms":  percentile(ms, 0.50),
+        "p95_ms":  percentile(ms, 0.95),
+        "p99_ms":  percentile(ms, 0.99),
+        "min_ms":  min(ms),
+        "max_ms":  max(ms),
+        **extra,
+    }
+
+
+def timed(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# =============================
+#  Benchmarks
+# =============================
+def bench_single_lookup(weather, api_key: str, repeat: int) -> dict:
+    """
+    One city, cache cleared before every lookup: two upstream calls each.
+    """
+    failures = 0
+
+    def lookup():
+        nonlocal failures
+        weather.weather_cache.clear()
+        if weather.fetch_weather("London", api_key) is None:
+            failures += 1
+    samples = timed(lookup, repeat)
+    return summarize(samples, failures=failures)
+
+
+def bench_cache_hit(weather, api_key: str, repeat: int) -> dict:
+    """
+    Repeated lookups of a cached city: no network at all.
+    """
+    weather.fetch_weather("Paris", api_key)
+    return summarize(timed(lambda: weather.fetch_weather("Paris", api_key), repeat * 50))
+
+
+def bench_batch(weather, api_key: str, cities: int, workers: int) -> dict:
+    """
+    Throughput of fetch_weather_many over distinct, uncached cities.
+    """
+    weather.weather_cache.clear()
+    names = [f"Batch City {i}" for i in range(cities)]
+    start = time.perf_counter()
+    failures = sum(1 for _, data, _ in weather.fetch_weather_many(names, api_key, max_workers=workers)
+                   if data is None)
+    elapsed = time.perf_counter() - start
+    return {
+        "cities":         cities,
+        "workers":        workers,
+        "failures":       failures,
+        "seconds":        elapsed,
+        "cities_per_sec": cities / elapsed,
+    }
+
+
+def bench_json_parse(repeat: int) -> dict:
+    """
+    Decoding a full forecast body and building the report from it.
+    """
+    import http_client
+    from model import WeatherReport
+
+    now = int(time.time())
+    current = json.dumps(current_payload("London", now)).encode()
+    forecast = json.dumps(forecast_payload("London", now)).encode()
+    decode = timed(lambda: http_client._loads(forecast), repeat * 10)
+    current_data, forecast_data = http_client._loads(current), http_client._loads(forecast)
+    build = timed(lambda: WeatherReport.from_owm(current_data, forecast_data), repeat * 10)
+    return {
+        "backend":     http_client._loads.__module__,
+        "body_bytes":  len(forecast),
+        "decode":      summarize(decode),
+        "build_model": summarize(build),
+    }
+
+
+def bench_render(repeat: int) -> dict:
+    """
+    Preparing forecast rows and building the HTML the page renders up
+    front: the first forecast day (later days are built when opened) and
+    the daily summary.
+    """
+    from analytics import summarize_days
+    from model import WeatherReport
+    from render import build_daily_summary_html, build_day_html, group_forecast_by_day, prepare_forecast
+
+    now = int(time.time())
+    report = WeatherReport.from_owm(current_payload("London", now), forecast_payload("London", now))
+    rows = prepare_forecast(report.forecast)
+    first_day = group_forecast_by_day(rows)[0][1]
+    days = summarize_days(report.forecast).rows()
+    results = {"prepare": summarize(timed(lambda: prepare_forecast(report.forecast), repeat * 10))}
+    for language in ("English", "עברית"):
+        label = "en" if language == "English" else "he"
+        results[f"day_html_{label}"] = summarize(
+            timed(lambda: build_day_html(first_day, language), repeat * 10))
+        results[f"summary_html_{label}"] = summarize(
+            timed(lambda: build_daily_summary_html(days, language), repeat * 10))
+    return results
+
+
+# =============================
+#  Comparison
+# =============================
+COMPARED = ("mean_ms", "p50_ms", "p95_ms", "cities_per_sec")
+
+
+def compare(current: dict, baseline: dict, prefix: str = ""):
+    """
+    Print every timing that is in both result sets, with the change in %.
+    """
+    for name, value in current.items():
+        other = baseline.get(name)
+        if isinstance(value, dict) and isinstance(other, dict):
+            compare(value, other, f"{prefix}{name}.")
+        elif name in COMPARED and isinstance(other, (int, float)) and other:
+            change = (value - other) / other * 100
+            print(f"{prefix + name:<40} {other:>12.3f} -> {value:>12.3f}  ({change:+.1f}%)")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# =============
+# RUN
+# =============
+def main():
+    parser = argparse.ArgumentParser(description="Weather Checker benchmark suite")
+    parser.add_argument("--repeat", type=int, default=50, help="samples per latency benchmark")
+    parser.add_argument("--batch-cities", type=int, default=200)
+    parser.add_argument("--batch-workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02, help="mock upstream latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--out", type=Path, help="result file (default: results/<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    mock = MockOWM(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                   throttle_rate=args.throttle_rate, retry_after=0, seed=0)
+    os.environ["OWM_BASE_URL"] = mock.base_url
+    with mock:
+        import weather
+        api_key = "benchmark"
+        results = {
+            "single_lookup": bench_single_lookup(weather, api_key, args.repeat),
+            "cache_hit":     bench_cache_hit(weather, api_key, args.repeat),
+            "batch":         bench_batch(weather, api_key, args.batch_cities, args.batch_workers),
+            "json_parse":    bench_json_parse(args.repeat),
+            "render":        bench_render(args.repeat),
+        }
+        upstream = mock.stats()
+
+    commit = git_commit()
+    output = {
+        "commit":    commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python":    platform.python_version(),
+        "platform":  platform.platform(),
+        "mock":      {"latency": args.latency, "jitter": args.jitter,
+                      "error_rate": args.error_rate, "throttle_rate": args.throttle_rate},
+        "upstream":  upstream,
+        "results":   results,
+    }
+    out = args.out or RESULTS_DIR / f"{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(output, indent=2, ensure_ascii=False))
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"\nSaved to {out}")
+
+    if args.compare:
+        print(f"\nCompared with {args.compare}:")
+        compare(results, json.loads(args.compare.read_text())["results"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import json
+
+import numpy as np
+import pytest
+
+from city_index import CityIndex, build_city_index, haversine_km
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    """
+    An index of 20,000 random cities, denser around the poles and the
+    antimeridian than a uniform spread would be.
+    """
+    rng = np.random.default_rng(0)
+    lats = np.concatenate([rng.uniform(-90, 90, 15000), rng.choice([-89.9, 89.9], 2500)])
+    lons = np.concatenate([rng.uniform(-180, 180, 15000), rng.uniform(-180, 180, 2500)])
+    lats = np.concatenate([lats, rng.uniform(-60, 60, 2500)])
+    lons = np.concatenate([lons, rng.choice([-179.95, 179.95], 2500)])
+    cities = [
+        {"id": i + 1, "name": f"City {i}", "country": "XX", "coord": {"lat": float(lat), "lon": float(lon)}}
+        for i, (lat, lon) in enumerate(zip(lats, lons))
+    ]
+    root = tmp_path_factory.mktemp("city_index")
+    (root / "city.list.json").write_text(json.dumps(cities))
+    build_city_index(root / "city.list.json", root / "index")
+    return CityIndex(root / "index")
+
+
+def _brute_within(index, south, west, north, east):
+    lats, lons = index._coords[:, 0], index._coords[:, 1]
+    inside = (lats >= south) & (lats <= north)
+    if east - west >= 360:
+        pass
+    elif west <= east:
+        inside &= (lons >= west) & (lons <= east)
+    else:
+        inside &= (lons >= west) | (lons <= east)
+    return {int(index._ids[i]) for i in np.flatnonzero(inside)}
+
+
+@pytest.mark.parametrize("box", [
+    (-90, -180, 90, 180),        # whole world, as a zoomed-out map sends it
+    (-90, -540, 90, 540),
+    (10, -20, 50, 40),
+    (-10, 170, 10, -170),        # crosses the antimeridian
+    (80, -180, 90, 180),         # polar cap
+    (-90, 179.5, -60, 180),
+    (30.25, 5.5, 30.75, 5.75),   # inside one grid cell
+])
+def test_within_matches_brute_force(index, box):
+    assert {city.id for city in index.within(*box)} == _brute_within(index, *box)
+
+
+@pytest.mark.parametrize("k", [1, 5, 40])
+def test_nearest_matches_brute_force(index, k):
+    rng = np.random.default_rng(k)
+    points = [(89.95, 0.0), (-89.95, 120.0), (0.0, 179.99), (12.5, -179.99)]
+    points += list(zip(rng.uniform(-90, 90, 25), rng.uniform(-180, 180, 25)))
+    for lat, lon in points:
+        found = index.nearest(lat, lon, k)
+        distances = haversine_km(lat, lon, index._coords[:, 0], index._coords[:, 1])
+        expected = np.sort(distances)[:k]
+        assert len(found) == k
+        assert np.allclose([d for _, d in found], expected, rtol=1e-9, atol=1e-6)
+
+
+@pytest.mark.parametrize("k", [0, -3])
+def test_nearest_without_cities_wanted(index, k):
+    assert index.nearest(10.0, 10.0, k) == []